@@ -1,11 +1,19 @@
-from pyJianYingDraft import trange, Video_scene_effect_type, Video_character_effect_type, CapCut_Video_scene_effect_type, CapCut_Video_character_effect_type, exceptions
+from pyJianYingDraft import trange, Video_scene_effect_type, Video_character_effect_type, CapCut_Video_scene_effect_type, CapCut_Video_character_effect_type
 import pyJianYingDraft as draft
+from types import MappingProxyType
 from typing import Optional, Dict, List, Union
 from create_draft import get_or_create_draft
 from tools.redis_cache import update_cache
 from util import generate_draft_url
 from settings import IS_CAPCUT_ENV
 
+# Name -> effect enum member for the current environment, built once at import and frozen.
+# Scene effects take precedence over character effects with the same name.
+if IS_CAPCUT_ENV:
+    _EFFECT_MAP = MappingProxyType({**CapCut_Video_character_effect_type.__members__, **CapCut_Video_scene_effect_type.__members__})
+else:
+    _EFFECT_MAP = MappingProxyType({**Video_character_effect_type.__members__, **Video_scene_effect_type.__members__})
+
 def add_effect_impl(
     effect_type: str,  # Changed to string type
     start: float = 0,
@@ -40,33 +48,25 @@ def add_effect_impl(
     t_range = trange(f"{start}s", f"{duration}s")
 
     # Dynamically get effect type object
-    if IS_CAPCUT_ENV:
-        # If in CapCut environment, use CapCut effects
-        effect_enum = CapCut_Video_scene_effect_type[effect_type]
-        if effect_enum is None:
-            effect_enum = CapCut_Video_character_effect_type[effect_type]
-    else:
-        # Default to using JianYing effects
-        effect_enum = Video_scene_effect_type[effect_type]
-        if effect_enum is None:
-            effect_enum = Video_character_effect_type[effect_type]
-    
+    effect_enum = _EFFECT_MAP.get(effect_type)
     if effect_enum is None:
         raise ValueError(f"Unknown effect type: {effect_type}")
 
     # Add effect track (only when track doesn't exist)
     if track_name is not None:
-        try:
-            imported_track=script.get_imported_track(draft.Track_type.effect, name=track_name)
-            # If no exception is thrown, the track already exists
-        except exceptions.TrackNotFound:
-            # Track doesn't exist, create a new track
+        # Membership checks instead of get_imported_track, which signals "not found" by raising
+        track_exists = (track_name in script.tracks) or any(
+            track.track_type == draft.Track_type.effect and track.name == track_name
+            for track in script.imported_tracks
+        )
+        if not track_exists:
             script.add_track(draft.Track_type.effect, track_name=track_name)
     else:
         script.add_track(draft.Track_type.effect)
 
     # Add effect
-    script.add_effect(effect_enum, t_range, params=params[::-1], track_name=track_name)
+    # parse_params indexes into the list, so a reversed iterator is not enough; skip the copy when empty
+    script.add_effect(effect_enum, t_range, params=params[::-1] if params else None, track_name=track_name)
 
     # 重要：将修改后的 script 重新保存到缓存中
     update_cache(draft_id, script)
@@ -23,6 +23,7 @@ from pyJianYingDraft.metadata.capcut_effect_meta import CapCut_Video_scene_effec
 import random
 import uuid
 import json
+import orjson
 import codecs
 import platform
 import sys
@@ -42,7 +43,7 @@ from create_draft import create_draft
 from util import generate_draft_url as utilgenerate_draft_url
 from tools.upload_manager import upload_to_qiniu
 # 直接从缓存读取进度，不唤起剪映应用
-from export_progress_cache import export_progress_cache
+from export_progress_cache import get_export_progress_cache
 from settings.local import DRAFT_FOLDER
 import shutil
 # 线程本地存储剪映控制器实例
@@ -64,8 +65,11 @@ if IS_WINDOWS:
 
 from settings.local import IS_CAPCUT_ENV, DRAFT_DOMAIN, PREVIEW_ROUTER, PORT
 
-from tools.redis_cache import DRAFT_CACHE, redis_cache
-from tools.redis_queue import export_queue_manager, export_task_processor
+from tools.redis_cache import DRAFT_CACHE
+from tools.redis_queue import (
+    export_queue_manager, export_task_processor,
+    SUBMIT_QUEUED, SUBMIT_ALREADY_QUEUED, SUBMIT_ALREADY_PROCESSING
+)
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -1421,7 +1425,7 @@ def query_draft():
             script = DRAFT_CACHE[draft_id]
             
             # Convert script object to dictionary and return directly
-            script_dict = json.loads(script.dumps())
+            script_dict = orjson.loads(script.dumps_bytes())
             
             return jsonify({
                 "success": True,
@@ -1618,7 +1622,7 @@ def retry_upload():
         
         if video_url:
             # 上传成功，更新进度缓存
-            export_progress_cache.set_progress(draft_name, {
+            get_export_progress_cache().set_progress(draft_name, {
                 "status": "finished",
                 "percent": 100.0,
                 "message": "重试上传成功",
@@ -1692,7 +1696,7 @@ def get_export_progress():
     
     try:
         # 获取指定草稿的进度
-        progress = export_progress_cache.get_progress(draft_name)
+        progress = get_export_progress_cache().get_progress(draft_name)
         if progress is None:
             progress = {"status": "idle", "percent": 0.0, "message": "", "start_time": 0, "elapsed": 0}
         
@@ -1739,13 +1743,19 @@ def submit_export_task():
         }
         
         # 提交任务到队列
-        task_id = export_queue_manager.submit_export_task(task_data)
+        task_id, status = export_queue_manager.submit_export_task(task_data)
         
+        messages = {
+            SUBMIT_QUEUED: "导出任务已提交到队列",
+            SUBMIT_ALREADY_QUEUED: "导出任务已在队列中，未重复提交",
+            SUBMIT_ALREADY_PROCESSING: "导出任务正在处理中，未重复提交"
+        }
         result["success"] = True
         result["output"] = {
             "draft_id": task_id,
             "draft_name": draft_id,
-            "message": "导出任务已提交到队列"
+            "status": status,
+            "message": messages[status]
         }
         return jsonify(result)
         
@@ -1796,19 +1806,15 @@ def get_export_task_result():
         return jsonify(result)
     
     try:
-        # 从Redis获取任务结果
-        result_key = f"export_result:{draft_id}"
-        task_result_json = redis_cache.redis_client.get(result_key)
+        # 从Redis获取任务结果，同时取回处理中记录
+        task_result, processing_task = export_queue_manager.get_task_result(draft_id)
         
-        if task_result_json:
-            task_result = json.loads(task_result_json.decode('utf-8'))
+        if task_result:
             result["success"] = True
             result["output"] = task_result
         else:
             # 检查任务是否还在处理中
-            processing_task_json = redis_cache.redis_client.hget("export_processing", draft_id)
-            if processing_task_json:
-                processing_task = json.loads(processing_task_json.decode('utf-8'))
+            if processing_task:
                 result["success"] = True
                 result["output"] = {
                     "draft_id": draft_id,
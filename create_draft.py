@@ -1,8 +1,16 @@
 import uuid
+import logging
 import pyJianYingDraft as draft
 import time
+import threading
 from tools.redis_cache import DRAFT_CACHE, update_cache
 
+logger = logging.getLogger(__name__)
+
+# Single-flight guard: draft_id -> Event set once the creating thread has stored the draft
+_inflight = {}
+_inflight_lock = threading.Lock()
+
 def create_draft(draft_id, width=1920, height=1080):
     """
     Create new CapCut draft with specified draft_id
@@ -27,24 +35,48 @@ def get_or_create_draft(draft_id=None, width=1920, height=1080):
     :param height: Video height, default 1920
     :return: (draft_id, script)
     """
-    global DRAFT_CACHE  # Declare use of global variable
-
     if not draft_id:
         raise ValueError("draft_id parameter is required and cannot be empty")
     
-    if draft_id is not None and draft_id in DRAFT_CACHE:
+    script = DRAFT_CACHE.get(draft_id)
+    if script is not None:
         # Get existing draft information from cache
-        print(f"Getting draft from cache: {draft_id}")
-        # Update last access time
-        update_cache(draft_id, DRAFT_CACHE[draft_id])
-        return draft_id, DRAFT_CACHE[draft_id]
-
-    # Create new draft logic
-    print(f"Creating new draft with ID: {draft_id}")
-    script, generated_draft_id = create_draft(
-        draft_id=draft_id,
-        width=width,
-        height=height,
-    )
-    return generated_draft_id, script
-    
\ No newline at end of file
+        logger.debug("Getting draft from cache: %s", draft_id)
+        # get() already renews the Redis TTL (at most once per refresh_interval);
+        # this only marks the draft as recently used in the local tier
+        DRAFT_CACHE.touch(draft_id)
+        return draft_id, script
+
+    # Create new draft logic; only one thread builds a given draft_id, others wait for it
+    while True:
+        with _inflight_lock:
+            event = _inflight.get(draft_id)
+            is_leader = event is None
+            if is_leader:
+                event = _inflight[draft_id] = threading.Event()
+
+        if not is_leader:
+            event.wait()
+            script = DRAFT_CACHE.get(draft_id)
+            if script is not None:
+                return draft_id, script
+            # The creating thread failed; try again, possibly as the new leader
+            continue
+
+        try:
+            # A previous leader may have finished between our cache miss and taking the lead
+            script = DRAFT_CACHE.get(draft_id)
+            if script is not None:
+                return draft_id, script
+
+            logger.info("Creating new draft with ID: %s", draft_id)
+            script, generated_draft_id = create_draft(
+                draft_id=draft_id,
+                width=width,
+                height=height,
+            )
+            return generated_draft_id, script
+        finally:
+            with _inflight_lock:
+                _inflight.pop(draft_id, None)
+            event.set()
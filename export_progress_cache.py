@@ -4,13 +4,12 @@
 完全基于 Redis 存储，复用 redis_cache.py 中的 Redis 连接
 """
 
-import json
 import logging
+import threading
 import time
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Union
 
-# 导入 Redis 缓存类
-from tools.redis_cache import RedisCache
+import orjson
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -18,6 +17,9 @@ logger = logging.getLogger(__name__)
 class ExportProgressCache:
     """导出进度缓存管理器（完全基于 Redis）"""
     
+    UPDATE_CHANNEL = "export_progress:channel"
+    """进度更新通知的 Pub/Sub 频道，消息内容为 draft_name"""
+    
     def __init__(self, cache_duration: int = 86400):
         """
         初始化导出进度缓存
@@ -27,46 +29,71 @@ class ExportProgressCache:
         """
         self.cache_duration = cache_duration
         
-        # 使用 RedisCache，如果连接失败直接抛出异常
-        self.redis_cache = RedisCache(
-            cache_prefix="export_progress",
-            ttl_hours=cache_duration / 3600  # 转换为小时
-        )
+        # 进度数据的键名和过期时间都由本类自行管理，直接共用草稿缓存的连接池，不再单独建池；
+        # 在此处导入，避免与 tools.redis_cache 之间的导入依赖
+        from tools.redis_cache import get_redis_cache
+        self.redis_cache = get_redis_cache()
         logger.info(f"导出进度缓存已连接到 Redis，TTL: {cache_duration}秒")
     
     def _get_progress_key(self, draft_name: str) -> str:
         """获取导出进度的 Redis 键名"""
         return f"export_progress:progress:{draft_name}"
     
-    def _serialize_progress(self, progress_data: dict) -> str:
-        """序列化进度数据"""
-        try:
-            return json.dumps(progress_data, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"序列化进度数据失败: {str(e)}")
-            raise
+    def _serialize_progress(self, progress_data: dict) -> bytes:
+        """序列化进度数据（orjson 直接输出 UTF-8 bytes，redis-py 可直接写入）"""
+        return orjson.dumps(progress_data)
     
-    def _deserialize_progress(self, data: str) -> dict:
+    def _deserialize_progress(self, data: Union[str, bytes]) -> dict:
         """反序列化进度数据"""
-        try:
-            return json.loads(data)
-        except Exception as e:
-            logger.error(f"反序列化进度数据失败: {str(e)}")
-            raise
+        return orjson.loads(data)
     
     def set_progress(self, draft_name: str, progress_data: dict) -> None:
-        """设置导出进度"""
-        progress_data["cache_time"] = time.time()
-        
-        cache_key = self._get_progress_key(draft_name)
-        serialized_data = self._serialize_progress(progress_data)
-        success = self.redis_cache.set_string(cache_key, serialized_data, self.cache_duration)
+        """设置导出进度（过期由 Redis TTL 负责），并在同一次往返中发布更新通知"""
+        try:
+            pipe = self.redis_cache.redis_client.pipeline(transaction=False)
+            self.queue_progress(pipe, draft_name, progress_data)
+            stored, _ = pipe.execute()
+        except Exception as e:
+            raise Exception(f"存储导出进度到 Redis 失败: {draft_name} - {str(e)}")
         
-        if success:
+        if stored:
             logger.debug(f"成功将导出进度存储到 Redis: {draft_name}")
         else:
             raise Exception(f"存储导出进度到 Redis 失败: {draft_name}")
     
+    def queue_progress(self, pipe, draft_name: str, progress_data: dict) -> None:
+        """
+        将进度写入和更新通知追加到调用方的管道中，由调用方统一 execute，
+        便于与队列操作合并为一次往返；管道结果中依次为 SET 和 PUBLISH 的返回值
+        """
+        pipe.set(self._get_progress_key(draft_name), self._serialize_progress(progress_data), ex=self.cache_duration)
+        pipe.publish(self.UPDATE_CHANNEL, draft_name)
+    
+    def subscribe_updates(self, callback: Callable[[str], None]):
+        """
+        订阅导出进度更新通知，替代轮询 get_progress
+        
+        Args:
+            callback: 回调函数，参数为发生更新的 draft_name
+        
+        Returns:
+            后台监听线程，调用其 stop() 方法取消订阅
+        """
+        def _handle(message):
+            data = message["data"]
+            callback(data.decode("utf-8") if isinstance(data, bytes) else data)
+        
+        pubsub = self.redis_cache.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.UPDATE_CHANNEL: _handle})
+        return pubsub.run_in_thread(sleep_time=1, daemon=True)
+    
+    def _refresh_elapsed(self, progress_data: dict) -> dict:
+        """更新elapsed时间（如果任务还在进行中）"""
+        if progress_data["status"] not in ["idle", "finished", "error", "export_success_upload_failed"]:
+            # start_time 是写入 Redis、可跨进程读取的墙钟时间戳，不能换成 monotonic；时钟回拨时避免出现负值
+            progress_data["elapsed"] = max(0.0, time.time() - progress_data["start_time"])
+        return progress_data
+    
     def get_progress(self, draft_name: str) -> Optional[dict]:
         """获取导出进度"""
         cache_key = self._get_progress_key(draft_name)
@@ -76,22 +103,23 @@ class ExportProgressCache:
             logger.debug(f"Redis 中不存在导出进度: {draft_name}")
             return None
         
-        progress_data = self._deserialize_progress(serialized_data)
-        
-        # 检查缓存是否过期
-        if time.time() - progress_data.get("cache_time", 0) > self.cache_duration:
-            # 缓存过期，删除记录
-            self.redis_cache.delete_key(cache_key)
-            logger.debug(f"导出进度缓存已过期并删除: {draft_name}")
-            return None
-        
-        # 更新elapsed时间（如果任务还在进行中）
-        if progress_data["status"] not in ["idle", "finished", "error", "export_success_upload_failed"]:
-            progress_data["elapsed"] = time.time() - progress_data["start_time"]
-        
+        progress_data = self._refresh_elapsed(self._deserialize_progress(serialized_data))
         logger.debug(f"成功从 Redis 获取导出进度: {draft_name}")
         return progress_data
     
+    def get_progress_many(self, draft_names: List[str]) -> Dict[str, Optional[dict]]:
+        """批量获取导出进度，一次 MGET 完成"""
+        cache_keys = [self._get_progress_key(draft_name) for draft_name in draft_names]
+        serialized_list = self.redis_cache.get_strings(cache_keys)
+        
+        result: Dict[str, Optional[dict]] = {}
+        for draft_name, serialized_data in zip(draft_names, serialized_list):
+            if serialized_data is None:
+                result[draft_name] = None
+            else:
+                result[draft_name] = self._refresh_elapsed(self._deserialize_progress(serialized_data))
+        return result
+    
     def clear_progress(self, draft_name: str) -> None:
         """清除指定草稿的进度记录"""
         cache_key = self._get_progress_key(draft_name)
@@ -102,5 +130,16 @@ class ExportProgressCache:
         else:
             logger.debug(f"Redis 中不存在导出进度: {draft_name}")
 
-# 全局缓存实例
-export_progress_cache = ExportProgressCache() 
\ No newline at end of file
+# 全局缓存实例（首次使用时才创建，避免导入时连接 Redis）
+_instance: Optional[ExportProgressCache] = None
+_instance_lock = threading.Lock()
+
+
+def get_export_progress_cache() -> ExportProgressCache:
+    """获取全局导出进度缓存实例（线程安全的延迟初始化）"""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = ExportProgressCache()
+    return _instance
@@ -1,12 +1,32 @@
 
 import oss2
 import os
+from functools import lru_cache
 from settings.local import OSS_CONFIG, MP4_OSS_CONFIG
 
-def upload_to_oss(path):
-    # Create OSS client
+@lru_cache(maxsize=None)
+def _get_bucket():
+    """Create the OSS client once and reuse it (and its connection pool) across uploads"""
     auth = oss2.Auth(OSS_CONFIG['access_key_id'], OSS_CONFIG['access_key_secret'])
-    bucket = oss2.Bucket(auth, OSS_CONFIG['endpoint'], OSS_CONFIG['bucket_name'])
+    return oss2.Bucket(auth, OSS_CONFIG['endpoint'], OSS_CONFIG['bucket_name'])
+
+@lru_cache(maxsize=None)
+def _get_mp4_bucket():
+    """Create the MP4 OSS client (custom domain, v4 signature) once and reuse it"""
+    # Directly use credentials from the configuration file
+    auth = oss2.AuthV4(MP4_OSS_CONFIG['access_key_id'], MP4_OSS_CONFIG['access_key_secret'])
+    
+    # Create OSS client with custom domain
+    return oss2.Bucket(
+        auth, 
+        MP4_OSS_CONFIG['endpoint'], 
+        MP4_OSS_CONFIG['bucket_name'], 
+        region=MP4_OSS_CONFIG['region'], 
+        is_cname=True
+    )
+
+def upload_to_oss(path):
+    bucket = _get_bucket()
     
     # Upload file
     object_name = os.path.basename(path)
@@ -22,17 +42,7 @@ def upload_to_oss(path):
 
 def upload_mp4_to_oss(path):
     """Special method for uploading MP4 files, using custom domain and v4 signature"""
-    # Directly use credentials from the configuration file
-    auth = oss2.AuthV4(MP4_OSS_CONFIG['access_key_id'], MP4_OSS_CONFIG['access_key_secret'])
-    
-    # Create OSS client with custom domain
-    bucket = oss2.Bucket(
-        auth, 
-        MP4_OSS_CONFIG['endpoint'], 
-        MP4_OSS_CONFIG['bucket_name'], 
-        region=MP4_OSS_CONFIG['region'], 
-        is_cname=True
-    )
+    bucket = _get_mp4_bucket()
     
     # Upload file
     object_name = os.path.basename(path)
@@ -1,50 +1,101 @@
 """进程控制器，用于管理剪映进程"""
 
 import os
+import re
+import signal
 import subprocess
 import psutil
 import logging
 
 logger = logging.getLogger('flask_video_generator')
 
+# 进程名匹配关键字（小写）
+JIANYING_TARGETS = ('jianying', 'capcut')
+DETECTOR_TARGETS = ('detector',)
+
+
+# 剪映可能的安装路径，需要根据实际的剪映安装路径进行调整
+CAPCUT_PATHS = (
+    r"C:\Program Files\CapCut\CapCut.exe",
+    r"C:\Program Files (x86)\CapCut\CapCut.exe",
+    # 可以添加更多可能的路径
+)
+
+# 首次探测到的剪映路径，避免每次重启都逐个 stat
+_capcut_path = None
+
+
+def _compile_targets(targets):
+    """将关键字编译为一个忽略大小写的正则，一次扫描匹配全部关键字"""
+    return re.compile('|'.join(re.escape(target) for target in targets), re.IGNORECASE)
+
+
+_JIANYING_PATTERN = _compile_targets(JIANYING_TARGETS)
+_DETECTOR_PATTERN = _compile_targets(DETECTOR_TARGETS)
+
+
+def _iter_matching(pattern):
+    """遍历进程名匹配给定正则的进程，只读取一次进程名"""
+    for proc in psutil.process_iter(['pid', 'name'], ad_value=''):
+        if pattern.search(proc.info['name'] or ''):
+            yield proc
+
 class ProcessController:
     """剪映进程控制器"""
+
+    # 由 restart_jianying 启动的剪映进程组ID（仅POSIX）
+    _capcut_pgid = None
     
-    @staticmethod
-    def kill_jianying():
+    @classmethod
+    def kill_jianying(cls):
         """杀死剪映进程"""
+        # 已知进程组时先一次性发送SIGTERM
+        if cls._capcut_pgid is not None and hasattr(os, 'killpg'):
+            pgid, cls._capcut_pgid = cls._capcut_pgid, None
+            try:
+                os.killpg(pgid, signal.SIGTERM)
+                logger.info(f"已终止剪映进程组 (PGID: {pgid})")
+            except ProcessLookupError:
+                logger.info(f"剪映进程组已不存在 (PGID: {pgid})")
+            except Exception as e:
+                logger.warning(f"终止剪映进程组失败 (PGID: {pgid}): {e}")
+
         try:
-            # 在Windows上查找剪映进程
-            for proc in psutil.process_iter(['pid', 'name']):
+            # 不在该进程组中的剪映进程（如本服务启动前或由用户手动打开的）仍需逐个查找终止；
+            # 已收到SIGTERM但尚未退出的进程再次终止也无害
+            for proc in _iter_matching(_JIANYING_PATTERN):
                 try:
-                    if 'jianying' in proc.info['name'].lower() or 'capcut' in proc.info['name'].lower():
-                        proc.terminate()
-                        logger.info(f"已终止剪映进程: {proc.info['name']} (PID: {proc.info['pid']})")
+                    proc.terminate()
+                    logger.info(f"已终止剪映进程: {proc.info['name']} (PID: {proc.info['pid']})")
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     pass
         except Exception as e:
             logger.error(f"终止剪映进程时出错: {e}")
     
-    @staticmethod
-    def restart_jianying():
+    @classmethod
+    def restart_jianying(cls):
         """重启剪映程序"""
+        global _capcut_path
         try:
-            # 这里需要根据实际的剪映安装路径进行调整
-            # Windows 默认路径
-            possible_paths = [
-                r"C:\Program Files\CapCut\CapCut.exe",
-                r"C:\Program Files (x86)\CapCut\CapCut.exe",
-                # 可以添加更多可能的路径
-            ]
-            
-            for path in possible_paths:
-                if os.path.exists(path):
-                    subprocess.Popen([path])
-                    logger.info(f"已启动剪映: {path}")
-                    return True
-            
-            logger.error("未找到剪映程序，请检查安装路径")
-            return False
+            # 首次调用时探测安装路径，之后直接复用
+            if _capcut_path is None:
+                _capcut_path = next((path for path in CAPCUT_PATHS if os.path.exists(path)), None)
+            if _capcut_path is None:
+                logger.error("未找到剪映程序，请检查安装路径")
+                return False
+
+            # 放入独立会话，便于之后按进程组整体终止
+            try:
+                proc = subprocess.Popen([_capcut_path], start_new_session=True)
+            except FileNotFoundError:
+                # 缓存的路径已失效，下次重新探测
+                logger.error(f"剪映程序已不存在: {_capcut_path}")
+                _capcut_path = None
+                return False
+            # 新会话的进程组ID即子进程PID；Windows上无进程组可用
+            cls._capcut_pgid = proc.pid if hasattr(os, 'killpg') else None
+            logger.info(f"已启动剪映: {_capcut_path}")
+            return True
         except Exception as e:
             logger.error(f"启动剪映时出错: {e}")
             return False
@@ -53,12 +104,11 @@ class ProcessController:
     def kill_jianying_detector():
         """杀死剪映检测器进程（如果有的话）"""
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
+            for proc in _iter_matching(_DETECTOR_PATTERN):
                 try:
-                    if 'detector' in proc.info['name'].lower():
-                        proc.terminate()
-                        logger.info(f"已终止检测器进程: {proc.info['name']} (PID: {proc.info['pid']})")
+                    proc.terminate()
+                    logger.info(f"已终止检测器进程: {proc.info['name']} (PID: {proc.info['pid']})")
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     pass
         except Exception as e:
-            logger.error(f"终止检测器进程时出错: {e}") 
\ No newline at end of file
+            logger.error(f"终止检测器进程时出错: {e}")
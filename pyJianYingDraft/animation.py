@@ -118,7 +118,7 @@ class Segment_animations:
 
     def add_animation(self, animation: Union[Video_animation, Text_animation]) -> None:
         # 不允许添加超过一个同类型的动画（如两个入场动画）
-        if animation.animation_type in [ani.animation_type for ani in self.animations]:
+        if any(ani.animation_type == animation.animation_type for ani in self.animations):
             raise ValueError(f"当前片段已存在类型为 '{animation.animation_type}' 的动画")
 
         if isinstance(animation, Video_animation):
@@ -179,7 +179,7 @@ class Audio_segment(Media_segment):
         effect_inst = Audio_effect(effect_type, params)
         if effect_id is not None:
             effect_inst.effect_id = effect_id
-        if effect_inst.category_id in [eff.category_id for eff in self.effects]:
+        if any(eff.category_id == effect_inst.category_id for eff in self.effects):
             raise ValueError("当前音频片段已经有此类型 (%s) 的音效了" % effect_inst.category_name)
         self.effects.append(effect_inst)
         self.extra_material_refs.append(effect_inst.effect_id)
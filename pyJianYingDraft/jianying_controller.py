@@ -18,7 +18,7 @@ from . import exceptions
 from .exceptions import AutomationError
 
 # 导入导出进度缓存
-from export_progress_cache import export_progress_cache
+from export_progress_cache import get_export_progress_cache
 
 # 导入配置
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -135,7 +135,7 @@ class Jianying_controller:
                 - video_url: 上传后的视频地址(导出完成时)
         """
         # 返回指定draft_name的进度
-        progress = export_progress_cache.get_progress(draft_name)
+        progress = get_export_progress_cache().get_progress(draft_name)
         if progress is None:
             return {"status": "idle", "percent": 0.0, "message": "", "start_time": 0, "elapsed": 0}
         return progress
@@ -143,7 +143,7 @@ class Jianying_controller:
     def _update_progress(self, draft_name: str, **kwargs):
         """更新导出进度（直接使用Redis缓存）"""
         # 从缓存获取当前进度，如果不存在则创建新的
-        progress_data = export_progress_cache.get_progress(draft_name)
+        progress_data = get_export_progress_cache().get_progress(draft_name)
         if progress_data is None:
             progress_data = {
                 "status": "idle", 
@@ -158,10 +158,11 @@ class Jianying_controller:
         progress_data.update(kwargs)
         # 更新elapsed时间
         if "elapsed" not in kwargs:
-            progress_data["elapsed"] = time.time() - progress_data["start_time"]
+            # start_time 是持久化的墙钟时间戳，时钟回拨时避免出现负值
+            progress_data["elapsed"] = max(0.0, time.time() - progress_data["start_time"])
         
         # 直接存储到缓存
-        export_progress_cache.set_progress(draft_name, progress_data)
+        get_export_progress_cache().set_progress(draft_name, progress_data)
 
     def _upload_with_retry(self, export_path: str, max_retries: int = 3) -> str:
         """带重试的上传方法"""
@@ -314,7 +315,7 @@ class Jianying_controller:
             "elapsed": 0,
             "video_url": ""
         }
-        export_progress_cache.set_progress(draft_name, progress_data)
+        get_export_progress_cache().set_progress(draft_name, progress_data)
 
         logger.info("Attempting to switch to home page.")
         self.get_window()
@@ -348,8 +349,8 @@ class Jianying_controller:
         
         logger.info(f"Waiting for edit window for draft: '{draft_name}' (timeout: 180s)")
         # 等待编辑窗口加载，最多等待180秒
-        wait_start_time = time.time()
-        while time.time() - wait_start_time < 180:
+        wait_start_time = time.monotonic()
+        while time.monotonic() - wait_start_time < 180:
             try:
                 self.get_window() # 尝试获取最新的窗口句柄和状态
             except AutomationError as e:
@@ -386,8 +387,8 @@ class Jianying_controller:
         
         logger.info(f"Waiting for export settings window (timeout: 180s) for draft: '{draft_name}'")
         # 等待导出窗口加载，最多等待180秒
-        wait_start_time = time.time()
-        while time.time() - wait_start_time < 180:
+        wait_start_time = time.monotonic()
+        while time.monotonic() - wait_start_time < 180:
             try:
                 self.get_window()
             except:
@@ -477,7 +478,7 @@ class Jianying_controller:
         time.sleep(5)
 
         # 等待导出完成
-        st = time.time()
+        st = time.monotonic()
         while True:
             # self.get_window()
             if self.app_status != "pre_export": continue
@@ -517,7 +518,7 @@ class Jianying_controller:
             except Exception as e:
                 self._update_progress(draft_name, message=f"获取进度时出错: {e}")
 
-            if time.time() - st > timeout:
+            if time.monotonic() - st > timeout:
                 self._update_progress(draft_name, status="error", message=f"导出超时{timeout}秒")
                 raise AutomationError("导出超时, 时限为%d秒" % timeout)
 
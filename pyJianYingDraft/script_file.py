@@ -1,10 +1,14 @@
 import os
+import re
+import sys
 import json
-import math
 from copy import deepcopy
+from operator import attrgetter
+
+import orjson
 
 from typing import Optional, Literal, Union, overload
-from typing import Type, Dict, List, Any
+from typing import Type, Dict, List, Set, Tuple, Any
 
 from .metadata.font_meta import Font_type
 
@@ -23,9 +27,78 @@ from .track import Track_type, Base_track, Track
 from settings.local import IS_CAPCUT_ENV
 from .metadata import Video_scene_effect_type, Video_character_effect_type, Filter_type
 
+# 导出草稿时写入的平台信息, 在所有草稿间共享, 不应修改
+_PLATFORM_META: Dict[str, Any] = {
+    "app_id": 359289,
+    "app_source": "cc",
+    "app_version": "6.5.0",
+    "device_id": "c4ca4238a0b923820dcc509a6f75849b",
+    "hard_disk_id": "307563e0192a94465c0e927fbc482942",
+    "mac_address": "c3371f2d4fb02791c067ce44d8fb4ed5",
+    "os": "mac",
+    "os_version": "15.5"
+}
+
+# 素材导出JSON中的全部列表字段, 顺序即导出顺序; 未在Script_material中维护的字段导出为空列表
+_MATERIAL_EXPORT_KEYS = (
+    "ai_translates", "audio_balances", "audio_effects", "audio_fades", "audio_track_indexes",
+    "audios", "beats", "canvases", "chromas", "color_curves", "digital_humans", "drafts", "effects",
+    "flowers", "green_screens", "handwrites", "hsl", "images", "log_color_wheels", "loudnesses",
+    "manual_deformations", "material_animations", "material_colors", "multi_language_refs",
+    "placeholders", "plugin_effects", "primary_color_wheels", "realtime_denoises", "shapes",
+    "smart_crops", "smart_relights", "sound_channel_mappings", "speeds", "stickers", "tail_leaders",
+    "text_templates", "texts", "time_marks", "transitions", "video_effects", "video_trackings",
+    "videos", "vocal_beautifys", "vocal_separations",
+)
+
+_TRACK_TYPE_BY_SEGMENT: Dict[type, Track_type] = {
+    t.value.segment_type: t for t in Track_type if t.value.segment_type is not None
+}
+
+def _as_track_type(segment_type: Union[Type[Base_segment], Track_type]) -> Optional[Track_type]:
+    """将片段类型转换为接受它的轨道类型, 轨道类型则原样返回"""
+    if isinstance(segment_type, Track_type):
+        return segment_type
+    return _TRACK_TYPE_BY_SEGMENT.get(segment_type)
+
+# 一个完整的SRT字幕块: 序号行, 时间戳行, 以及若干非空的文本行(以空行或文件末尾结束)
+_SRT_BLOCK_RE = re.compile(
+    r"^[ \t]*\d+[ \t]*\n"
+    r"[ \t]*(\d+:\d+:\d+,\d+)[ \t]*-->[ \t]*(\d+:\d+:\d+,\d+)[ \t]*(?:\n|\Z)"
+    r"((?:[ \t]*\S[^\n]*(?:\n|\Z))*)",
+    re.MULTILINE
+)
+
+def _restore_slots(obj: object, state: Any) -> Dict[str, Any]:
+    """将pickle状态写回使用`__slots__`的对象, 返回还原出的属性字典
+
+    兼容引入`__slots__`之前以`__dict__`形式缓存的旧版本对象
+    """
+    if isinstance(state, tuple):
+        dict_state, slot_state = state
+        state = {**(dict_state or {}), **(slot_state or {})}
+    for name, value in state.items():
+        if name in obj.__slots__:
+            setattr(obj, name, value)
+    return state
+
+def _take_unseen(items: List[Any], known_ids: Set[str], id_attr: str) -> List[Any]:
+    """筛选出id不在`known_ids`中的元素(同一id只保留一个), 并将其id加入`known_ids`"""
+    new_items = {getattr(item, id_attr): item for item in items if getattr(item, id_attr) not in known_ids}
+    known_ids.update(new_items)
+    return list(new_items.values())
+
 class Script_material:
     """草稿文件中的素材信息部分"""
 
+    __slots__ = (
+        "audios", "videos", "stickers", "texts",
+        "audio_effects", "audio_fades", "animations", "video_effects",
+        "speeds", "masks", "transitions", "filters", "canvases",
+        "_video_ids", "_audio_ids", "_fade_ids", "_audio_effect_ids",
+        "_animation_ids", "_video_effect_ids", "_transition_ids", "_filter_ids",
+    )
+
     audios: List[Audio_material]
     """音频素材列表"""
     videos: List[Video_material]
@@ -55,6 +128,16 @@ class Script_material:
     canvases: List[BackgroundFilling]
     """背景填充列表"""
 
+    _video_ids: Set[str]
+    _audio_ids: Set[str]
+    _fade_ids: Set[str]
+    _audio_effect_ids: Set[str]
+    _animation_ids: Set[str]
+    _video_effect_ids: Set[str]
+    _transition_ids: Set[str]
+    _filter_ids: Set[str]
+    """以上为各素材列表的id索引, 与对应列表同步维护, 供`__contains__`进行O(1)查找"""
+
     def __init__(self):
         self.audios = []
         self.videos = []
@@ -72,6 +155,45 @@ class Script_material:
         self.filters = []
         self.canvases = []
 
+        self._rebuild_id_indexes()
+
+    def _rebuild_id_indexes(self) -> None:
+        """根据当前素材列表重建id索引"""
+        self._video_ids = {video.material_id for video in self.videos}
+        self._audio_ids = {audio.material_id for audio in self.audios}
+        self._fade_ids = {fade.fade_id for fade in self.audio_fades}
+        self._audio_effect_ids = {effect.effect_id for effect in self.audio_effects}
+        self._animation_ids = {ani.animation_id for ani in self.animations}
+        self._video_effect_ids = {effect.global_id for effect in self.video_effects}
+        self._transition_ids = {transition.global_id for transition in self.transitions}
+        self._filter_ids = {filter_.global_id for filter_ in self.filters}
+
+    def __setstate__(self, state: Any) -> None:
+        state = _restore_slots(self, state)
+        # 兼容缓存中没有id索引的旧版本对象
+        if "_filter_ids" not in state:
+            self._rebuild_id_indexes()
+
+    def add_video_effects(self, effects: List[Video_effect]) -> None:
+        """批量添加视频特效, 已存在的特效会被跳过"""
+        self.video_effects.extend(_take_unseen(effects, self._video_effect_ids, "global_id"))
+
+    def add_audio_effects(self, effects: List[Audio_effect]) -> None:
+        """批量添加音频特效, 已存在的特效会被跳过"""
+        self.audio_effects.extend(_take_unseen(effects, self._audio_effect_ids, "effect_id"))
+
+    def add_filters(self, filters: List[Filter]) -> None:
+        """批量添加滤镜, 已存在的滤镜会被跳过"""
+        self.filters.extend(_take_unseen(filters, self._filter_ids, "global_id"))
+
+    def contains_video(self, material_id: str) -> bool:
+        """判断给定id的视频素材是否已存在"""
+        return material_id in self._video_ids
+
+    def contains_audio(self, material_id: str) -> bool:
+        """判断给定id的音频素材是否已存在"""
+        return material_id in self._audio_ids
+
     @overload
     def __contains__(self, item: Union[Video_material, Audio_material]) -> bool: ...
     @overload
@@ -81,71 +203,39 @@ class Script_material:
 
     def __contains__(self, item) -> bool:
         if isinstance(item, Video_material):
-            return item.material_id in [video.material_id for video in self.videos]
+            return item.material_id in self._video_ids
         elif isinstance(item, Audio_material):
-            return item.material_id in [audio.material_id for audio in self.audios]
+            return item.material_id in self._audio_ids
         elif isinstance(item, Audio_fade):
-            return item.fade_id in [fade.fade_id for fade in self.audio_fades]
+            return item.fade_id in self._fade_ids
         elif isinstance(item, Audio_effect):
-            return item.effect_id in [effect.effect_id for effect in self.audio_effects]
+            return item.effect_id in self._audio_effect_ids
         elif isinstance(item, Segment_animations):
-            return item.animation_id in [ani.animation_id for ani in self.animations]
+            return item.animation_id in self._animation_ids
         elif isinstance(item, Video_effect):
-            return item.global_id in [effect.global_id for effect in self.video_effects]
+            return item.global_id in self._video_effect_ids
         elif isinstance(item, Transition):
-            return item.global_id in [transition.global_id for transition in self.transitions]
+            return item.global_id in self._transition_ids
         elif isinstance(item, Filter):
-            return item.global_id in [filter_.global_id for filter_ in self.filters]
+            return item.global_id in self._filter_ids
         else:
             raise TypeError("Invalid argument type '%s'" % type(item))
 
     def export_json(self) -> Dict[str, List[Any]]:
-        result = {
-            "ai_translates": [],
-            "audio_balances": [],
-            "audio_effects": [effect.export_json() for effect in self.audio_effects],
-            "audio_fades": [fade.export_json() for fade in self.audio_fades],
-            "audio_track_indexes": [],
-            "audios": [audio.export_json() for audio in self.audios],
-            "beats": [],
-            "canvases": [canvas.export_json() for canvas in self.canvases],
-            "chromas": [],
-            "color_curves": [],
-            "digital_humans": [],
-            "drafts": [],
-            "effects": [_filter.export_json() for _filter in self.filters],
-            "flowers": [],
-            "green_screens": [],
-            "handwrites": [],
-            "hsl": [],
-            "images": [],
-            "log_color_wheels": [],
-            "loudnesses": [],
-            "manual_deformations": [],
-            "material_animations": [ani.export_json() for ani in self.animations],
-            "material_colors": [],
-            "multi_language_refs": [],
-            "placeholders": [],
-            "plugin_effects": [],
-            "primary_color_wheels": [],
-            "realtime_denoises": [],
-            "shapes": [],
-            "smart_crops": [],
-            "smart_relights": [],
-            "sound_channel_mappings": [],
-            "speeds": [spd.export_json() for spd in self.speeds],
-            "stickers": self.stickers,
-            "tail_leaders": [],
-            "text_templates": [],
-            "texts": self.texts,
-            "time_marks": [],
-            "transitions": [transition.export_json() for transition in self.transitions],
-            "video_effects": [effect.export_json() for effect in self.video_effects],
-            "video_trackings": [],
-            "videos": [video.export_json() for video in self.videos],
-            "vocal_beautifys": [],
-            "vocal_separations": []
-        }
+        # 每次导出都需要全新的空列表, 因为导入的素材会被extend到其中
+        result: Dict[str, List[Any]] = {key: [] for key in _MATERIAL_EXPORT_KEYS}
+        result["audio_effects"] = [effect.export_json() for effect in self.audio_effects]
+        result["audio_fades"] = [fade.export_json() for fade in self.audio_fades]
+        result["audios"] = [audio.export_json() for audio in self.audios]
+        result["canvases"] = [canvas.export_json() for canvas in self.canvases]
+        result["effects"] = [_filter.export_json() for _filter in self.filters]
+        result["material_animations"] = [ani.export_json() for ani in self.animations]
+        result["speeds"] = [spd.export_json() for spd in self.speeds]
+        result["stickers"] = self.stickers
+        result["texts"] = self.texts
+        result["transitions"] = [transition.export_json() for transition in self.transitions]
+        result["video_effects"] = [effect.export_json() for effect in self.video_effects]
+        result["videos"] = [video.export_json() for video in self.videos]
 
         # 根据IS_CAPCUT_ENV决定使用common_mask还是masks
         if IS_CAPCUT_ENV:
@@ -158,6 +248,12 @@ class Script_material:
 class Script_file:
     """剪映草稿文件, 大部分接口定义在此"""
 
+    __slots__ = (
+        "save_path", "content", "width", "height", "fps", "duration",
+        "materials", "tracks", "_tracks_by_type", "imported_materials", "imported_tracks",
+        "_parsed_text_contents", "_imported_material_indexes",
+    )
+
     save_path: Optional[str]
     """草稿文件保存路径, 仅在模板模式下有效"""
     content: Dict[str, Any]
@@ -176,13 +272,21 @@ class Script_file:
     """草稿文件中的素材信息部分"""
     tracks: Dict[str, Track]
     """轨道信息"""
+    _tracks_by_type: Dict[Track_type, List[Track]]
+    """按轨道类型索引的`tracks`, 与之同步维护"""
 
     imported_materials: Dict[str, List[Dict[str, Any]]]
     """导入的素材信息"""
     imported_tracks: List[Track]
     """导入的轨道信息"""
+    _parsed_text_contents: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]
+    """文本素材id -> (素材, 解析后的content), 由`replace_text`修改, 在导出时才写回素材的content字段"""
+    _imported_material_indexes: Dict[str, Tuple[List[Dict[str, Any]], int, Dict[str, Dict[str, Any]]]]
+    """素材类型 -> (建立索引时的素材列表, 列表长度, 素材id -> 素材), 列表被替换或长度变化时重建"""
 
     TEMPLATE_FILE = "draft_content_template.json"
+    _template_bytes: Optional[bytes] = None
+    """草稿模板文件的原始内容, 首次使用时读取并缓存"""
 
     def __init__(self, width: int, height: int, fps: int = 30):
         """创建一个剪映草稿
@@ -201,12 +305,34 @@ class Script_file:
 
         self.materials = Script_material()
         self.tracks = {}
+        self._tracks_by_type = {}
 
         self.imported_materials = {}
         self.imported_tracks = []
+        self._parsed_text_contents = {}
+        self._imported_material_indexes = {}
 
-        with open(os.path.join(os.path.dirname(__file__), self.TEMPLATE_FILE), "r", encoding="utf-8") as f:
-            self.content = json.load(f)
+        self.content = orjson.loads(self._load_template_bytes())
+
+    def __setstate__(self, state: Any) -> None:
+        state = _restore_slots(self, state)
+        # 兼容缓存中没有轨道类型索引的旧版本对象
+        if "_tracks_by_type" not in state:
+            self._tracks_by_type = {}
+            for track in self.tracks.values():
+                self._tracks_by_type.setdefault(track.track_type, []).append(track)
+        if "_parsed_text_contents" not in state:
+            self._parsed_text_contents = {}
+        if "_imported_material_indexes" not in state:
+            self._imported_material_indexes = {}
+
+    @classmethod
+    def _load_template_bytes(cls) -> bytes:
+        """读取并缓存草稿模板文件, 每个实例各自解析一份以避免共享可变状态"""
+        if cls._template_bytes is None:
+            with open(os.path.join(os.path.dirname(__file__), cls.TEMPLATE_FILE), "rb") as f:
+                cls._template_bytes = f.read()
+        return cls._template_bytes
 
     @staticmethod
     def load_template(json_path: str) -> "Script_file":
@@ -222,25 +348,27 @@ class Script_file:
         obj.save_path = json_path
         if not os.path.exists(json_path):
             raise FileNotFoundError("JSON文件 '%s' 不存在" % json_path)
-        with open(json_path, "r", encoding="utf-8") as f:
-            obj.content = json.load(f)
+        with open(json_path, "rb") as f:
+            obj.content = orjson.loads(f.read())
 
         util.assign_attr_with_json(obj, ["fps", "duration"], obj.content)
         util.assign_attr_with_json(obj, ["width", "height"], obj.content["canvas_config"])
 
-        obj.imported_materials = deepcopy(obj.content["materials"])
+        obj.imported_materials = util.json_clone(obj.content["materials"])
         obj.imported_tracks = [import_track(track_data, obj.imported_materials) for track_data in obj.content["tracks"]]
 
         return obj
 
     def add_material(self, material: Union[Video_material, Audio_material]) -> "Script_file":
         """向草稿文件中添加一个素材"""
-        if material in self.materials:  # 素材已存在
-            return self
         if isinstance(material, Video_material):
-            self.materials.videos.append(material)
+            if not self.materials.contains_video(material.material_id):
+                self.materials.videos.append(material)
+                self.materials._video_ids.add(material.material_id)
         elif isinstance(material, Audio_material):
-            self.materials.audios.append(material)
+            if not self.materials.contains_audio(material.material_id):
+                self.materials.audios.append(material)
+                self.materials._audio_ids.add(material.material_id)
         else:
             raise TypeError("错误的素材类型: '%s'" % type(material))
         return self
@@ -267,10 +395,10 @@ class Script_file:
         """
 
         if track_name is None:
-            if track_type in [track.track_type for track in self.tracks.values()]:
+            if self._tracks_by_type.get(track_type):
                 raise NameError("'%s' 类型的轨道已存在, 请为新轨道指定名称以避免混淆" % track_type)
             track_name = track_type.name
-        if track_name in [track.name for track in self.tracks.values()]:
+        if track_name in self.tracks:
             print("名为 '%s' 的轨道已存在" % track_name)
             return self
 
@@ -278,21 +406,23 @@ class Script_file:
         if absolute_index is not None:
             render_index = absolute_index
 
-        self.tracks[track_name] = Track(track_type, track_name, render_index, mute)
+        track = Track(track_type, track_name, render_index, mute)
+        self.tracks[track_name] = track
+        self._tracks_by_type.setdefault(track_type, []).append(track)
         return self
 
-    def get_track(self, segment_type: Type[Base_segment], track_name: Optional[str]) -> Track:
+    def get_track(self, segment_type: Union[Type[Base_segment], Track_type], track_name: Optional[str]) -> Track:
         # 指定轨道名称
         if track_name is not None:
             if track_name not in self.tracks:
                 raise NameError("不存在名为 '%s' 的轨道" % track_name)
             return self.tracks[track_name]
         # 寻找唯一的同类型的轨道
-        count = sum([1 for track in self.tracks.values() if track.track_type == segment_type])
-        if count == 0: raise exceptions.TrackNotFound(f"不存在接受 '{segment_type}' 的轨道")
-        if count > 1: raise NameError(f"存在多个接受 '{segment_type}' 的轨道, 请指定轨道名称")
+        tracks = self._tracks_by_type.get(_as_track_type(segment_type), [])
+        if len(tracks) == 0: raise exceptions.TrackNotFound(f"不存在接受 '{segment_type}' 的轨道")
+        if len(tracks) > 1: raise NameError(f"存在多个接受 '{segment_type}' 的轨道, 请指定轨道名称")
 
-        return next(track for track in self.tracks.values() if track.accept_segment_type == segment_type)
+        return tracks[0]
 
     def _get_track_and_imported_track(self, segment_type: Type[Base_segment], track_name: Optional[str]) -> List[Track]:
         """获取指定类型的所有轨道（包括普通轨道和导入的轨道）
@@ -322,9 +452,7 @@ class Script_file:
                 raise NameError("不存在名为 '%s' 的轨道" % track_name)
         else:
             # 在普通轨道中查找接受该类型片段的轨道
-            for track in self.tracks.values():
-                if track.accept_segment_type == segment_type:
-                    result_tracks.append(track)
+            result_tracks.extend(self._tracks_by_type.get(_as_track_type(segment_type), []))
             # 在导入的轨道中查找接受该类型片段的轨道
             for track in self.imported_tracks:
                 if track.accept_segment_type == segment_type:
@@ -336,6 +464,73 @@ class Script_file:
         
         return result_tracks
 
+    def _add_video_segment_materials(self, segment: Video_segment) -> None:
+        """添加视频片段相关的素材"""
+        # 出入场等动画
+        if (segment.animations_instance is not None) and (segment.animations_instance not in self.materials):
+            self.materials.animations.append(segment.animations_instance)
+            self.materials._animation_ids.add(segment.animations_instance.animation_id)
+        # 特效
+        if segment.effects:
+            self.materials.add_video_effects(segment.effects)
+        # 滤镜
+        if segment.filters:
+            self.materials.add_filters(segment.filters)
+        # 蒙版
+        if segment.mask is not None:
+            self.materials.masks.append(segment.mask.export_json())
+        # 转场
+        if (segment.transition is not None) and (segment.transition not in self.materials):
+            self.materials.transitions.append(segment.transition)
+            self.materials._transition_ids.add(segment.transition.global_id)
+        # 背景填充
+        if segment.background_filling is not None:
+            self.materials.canvases.append(segment.background_filling)
+
+        self.materials.speeds.append(segment.speed)
+        self.add_material(segment.material_instance)
+
+    def _add_sticker_segment_materials(self, segment: Sticker_segment) -> None:
+        """添加贴纸片段相关的素材"""
+        self.materials.stickers.append(segment.export_material())
+
+    def _add_audio_segment_materials(self, segment: Audio_segment) -> None:
+        """添加音频片段相关的素材"""
+        # 淡入淡出
+        if (segment.fade is not None) and (segment.fade not in self.materials):
+            self.materials.audio_fades.append(segment.fade)
+            self.materials._fade_ids.add(segment.fade.fade_id)
+        # 特效
+        if segment.effects:
+            self.materials.add_audio_effects(segment.effects)
+        self.materials.speeds.append(segment.speed)
+        self.add_material(segment.material_instance)
+
+    def _add_text_segment_materials(self, segment: Text_segment) -> None:
+        """添加文本片段相关的素材"""
+        # 出入场等动画
+        if (segment.animations_instance is not None) and (segment.animations_instance not in self.materials):
+            self.materials.animations.append(segment.animations_instance)
+            self.materials._animation_ids.add(segment.animations_instance.animation_id)
+        # 气泡效果
+        if segment.bubble is not None:
+            self.materials.filters.append(segment.bubble)
+            self.materials._filter_ids.add(segment.bubble.global_id)
+        # 花字效果
+        if segment.effect is not None:
+            self.materials.filters.append(segment.effect)
+            self.materials._filter_ids.add(segment.effect.global_id)
+        # 字体样式
+        self.materials.texts.append(segment.export_material())
+
+    _SEGMENT_HANDLERS = {
+        Video_segment: _add_video_segment_materials,
+        Sticker_segment: _add_sticker_segment_materials,
+        Audio_segment: _add_audio_segment_materials,
+        Text_segment: _add_text_segment_materials,
+    }
+    """片段类型 -> 添加其相关素材的方法"""
+
     def add_segment(self, segment: Union[Video_segment, Sticker_segment, Audio_segment, Text_segment],
                     track_name: Optional[str] = None) -> "Script_file":
         """向指定轨道中添加一个片段
@@ -349,67 +544,59 @@ class Script_file:
             `TypeError`: 片段类型不匹配轨道类型
             `SegmentOverlap`: 新片段与已有片段重叠
         """
-        tracks = self._get_track_and_imported_track(type(segment), track_name)
+        segment_type = type(segment)
+        tracks = self._get_track_and_imported_track(segment_type, track_name)
         target = tracks[0] 
 
         # 加入轨道并更新时长
         target.add_segment(segment)
-        self.duration = max(self.duration, segment.end)
+        end = segment.end
+        if end > self.duration:
+            self.duration = end
 
         # 自动添加相关素材
-        if isinstance(segment, Video_segment):
-            # 出入场等动画
-            if (segment.animations_instance is not None) and (segment.animations_instance not in self.materials):
-                self.materials.animations.append(segment.animations_instance)
-            # 特效
-            for effect in segment.effects:
-                if effect not in self.materials:
-                    self.materials.video_effects.append(effect)
-            # 滤镜
-            for filter_ in segment.filters:
-                if filter_ not in self.materials:
-                    self.materials.filters.append(filter_)
-            # 蒙版
-            if segment.mask is not None:
-                self.materials.masks.append(segment.mask.export_json())
-            # 转场
-            if (segment.transition is not None) and (segment.transition not in self.materials):
-                self.materials.transitions.append(segment.transition)
-            # 背景填充
-            if segment.background_filling is not None:
-                self.materials.canvases.append(segment.background_filling)
-
-            self.materials.speeds.append(segment.speed)
-        elif isinstance(segment, Sticker_segment):
-            self.materials.stickers.append(segment.export_material())
-        elif isinstance(segment, Audio_segment):
-            # 淡入淡出
-            if (segment.fade is not None) and (segment.fade not in self.materials):
-                self.materials.audio_fades.append(segment.fade)
-            # 特效
-            for effect in segment.effects:
-                if effect not in self.materials:
-                    self.materials.audio_effects.append(effect)
-            self.materials.speeds.append(segment.speed)
-        elif isinstance(segment, Text_segment):
-            # 出入场等动画
-            if (segment.animations_instance is not None) and (segment.animations_instance not in self.materials):
-                self.materials.animations.append(segment.animations_instance)
-            # 气泡效果
-            if segment.bubble is not None:
-                self.materials.filters.append(segment.bubble)
-            # 花字效果
-            if segment.effect is not None:
-                self.materials.filters.append(segment.effect)
-            # 字体样式
-            self.materials.texts.append(segment.export_material())
-
-        # 添加片段素材
-        if isinstance(segment, (Video_segment, Audio_segment)):
-            self.add_material(segment.material_instance)
+        self._add_segment_materials(segment, segment_type)
+
+        return self
+
+    def add_segments(self, segments: List[Union[Video_segment, Sticker_segment, Audio_segment, Text_segment]],
+                     track_name: Optional[str] = None) -> "Script_file":
+        """向指定轨道中批量添加同类型的片段, 效果同逐个调用`add_segment`, 但重叠检查只需进行一次
+
+        Args:
+            segments (`List[Video_segment | Sticker_segment | Audio_segment | Text_segment]`): 要添加的片段
+            track_name (`str`, optional): 添加到的轨道名称. 当此类型的轨道仅有一条时可省略.
+
+        Raises:
+            `NameError`: 未找到指定名称的轨道, 或必须提供`track_name`参数时未提供
+            `TypeError`: 片段类型不匹配轨道类型
+            `SegmentOverlap`: 新片段与已有片段或其它新片段重叠, 此时不会添加任何片段
+        """
+        if not segments:
+            return self
+
+        segment_type = type(segments[0])
+        target = self._get_track_and_imported_track(segment_type, track_name)[0]
+        target.add_segments(segments)
+
+        for segment in segments:
+            end = segment.end
+            if end > self.duration:
+                self.duration = end
+            self._add_segment_materials(segment, type(segment))
 
         return self
 
+    def _add_segment_materials(self, segment: Base_segment, segment_type: Type[Base_segment]) -> None:
+        """根据片段类型添加其相关素材"""
+        handler = self._SEGMENT_HANDLERS.get(segment_type)
+        if handler is None:
+            # 兼容片段子类, 按继承关系查找
+            handler = next((self._SEGMENT_HANDLERS[cls] for cls in segment_type.__mro__
+                            if cls in self._SEGMENT_HANDLERS), None)
+        if handler is not None:
+            handler(self, segment)
+
     def add_effect(self, effect: Union[Video_scene_effect_type, Video_character_effect_type],
                    t_range: Timerange, track_name: Optional[str] = None, *,
                    params: Optional[List[Optional[float]]] = None) -> "Script_file":
@@ -432,11 +619,14 @@ class Script_file:
         # 加入轨道并更新时长
         segment = Effect_segment(effect, t_range, params)
         target.add_segment(segment)
-        self.duration = max(self.duration, t_range.start + t_range.duration)
+        end = t_range.end
+        if end > self.duration:
+            self.duration = end
 
         # 自动添加相关素材
         if segment.effect_inst not in self.materials:
             self.materials.video_effects.append(segment.effect_inst)
+            self.materials._video_effect_ids.add(segment.effect_inst.global_id)
         return self
 
     def add_filter(self, filter_meta: Filter_type, t_range: Timerange,
@@ -459,10 +649,13 @@ class Script_file:
         # 加入轨道并更新时长
         segment = Filter_segment(filter_meta, t_range, intensity / 100.0)  # 转换为0-1范围
         target.add_segment(segment)
-        self.duration = max(self.duration, t_range.end)
+        end = t_range.end
+        if end > self.duration:
+            self.duration = end
 
         # 自动添加相关素材
         self.materials.filters.append(segment.material)
+        self.materials._filter_ids.add(segment.material.global_id)
         return self
 
     def import_srt(self, srt_content: str, track_name: str, *,
@@ -499,6 +692,7 @@ class Script_file:
         if style_reference is None and clip_settings is None:
             raise ValueError("未提供样式参考时请提供`clip_settings`参数")
 
+        font_type = None
         if font:
             try:
                 font_type = getattr(Font_type, font)
@@ -506,45 +700,50 @@ class Script_file:
                 available_fonts = [attr for attr in dir(Font_type) if not attr.startswith('_')]
                 raise ValueError(f"Unsupported font: {font}, please use one of the fonts in Font_type: {available_fonts}")
 
+        # 字幕固定宽度只取决于画布方向, 对所有字幕相同
+        if self.width < self.height:  # 竖屏
+            fixed_width = int(1080 * 0.6)
+        else:  # 横屏
+            fixed_width = int(1920 * 0.7)
+
         time_offset = tim(time_offset)
         # 检查 track_name 是否存在于 self.tracks 或 self.imported_tracks
         track_exists = (track_name in self.tracks) or any(track.name == track_name for track in self.imported_tracks)
         if not track_exists:
             self.add_track(Track_type.text, track_name, relative_index=999)  # 在所有文本轨道的最上层
 
-        # 检查是否为本地文件路径
-        if os.path.exists(srt_content):
+        # 检查是否为本地文件路径; 多行文本必然是字幕内容本身, 无需再访问文件系统
+        if "\n" not in srt_content and os.path.exists(srt_content):
             with open(srt_content, "r", encoding="utf-8-sig") as srt_file:
-                lines = srt_file.readlines()
+                srt_text = srt_file.read()
         else:
-            # 直接将内容按行分割
-            lines = srt_content.splitlines()
-
+            srt_text = srt_content
+        if "\r" in srt_text:
+            srt_text = srt_text.replace("\r\n", "\n").replace("\r", "\n")
+
+        # 样式参考及覆盖它的参数对所有字幕相同, 只提取一次
+        if style_reference:
+            style_snapshot = Text_segment.build_template_snapshot(style_reference)
+            if clip_settings is not None:
+                style_snapshot["clip_settings"] = clip_settings
+            if border:
+                style_snapshot["border"] = border
+            if background:
+                style_snapshot["background"] = background
+            if font_type:
+                style_snapshot["font"] = font_type.value
+
+        segments: List[Text_segment] = []
         def __add_text_segment(text: str, t_range: Timerange) -> None:
-            fixed_width = -1
-            if self.width < self.height:  # 竖屏
-                fixed_width = int(1080 * 0.6)
-            else:  # 横屏
-                fixed_width = int(1920 * 0.7)
-            
             if style_reference:
-                seg = Text_segment.create_from_template(text, t_range, style_reference)
-                if clip_settings is not None:
-                    seg.clip_settings = deepcopy(clip_settings)
+                seg = Text_segment.create_from_snapshot(text, t_range, style_snapshot)
                 # 复制其他可选属性
-                if border:
-                    seg.border = deepcopy(border)
-                if background:
-                    seg.background = deepcopy(background)
                 if bubble:
                     seg.bubble = deepcopy(bubble)
                 if effect:
                     seg.effect = deepcopy(effect)
                 # 设置固定宽高
                 seg.fixed_width = fixed_width
-                # 设置字体
-                if font_type:
-                    seg.font = font_type.value
             else:
                 seg = Text_segment(text, t_range, style=text_style, clip_settings=clip_settings,
                                   border=border, background=background,
@@ -558,46 +757,32 @@ class Script_file:
             # 如果有气泡或花字效果，需要将它们添加到素材列表中
             if bubble:
                 self.materials.filters.append(bubble)
+                self.materials._filter_ids.add(bubble.global_id)
             if effect:
                 self.materials.filters.append(effect)
-            self.add_segment(seg, track_name)
-
-        index = 0
-        text: str = ""
-        text_trange: Timerange
-        read_state: Literal["index", "timestamp", "content"] = "index"
-        while index < len(lines):
-            line = lines[index].strip()
-            if read_state == "index":
-                if len(line) == 0:
-                    index += 1
-                    continue
-                if not line.isdigit():
-                    raise ValueError("Expected a number at line %d, got '%s'" % (index+1, line))
-                index += 1
-                read_state = "timestamp"
-            elif read_state == "timestamp":
-                # 读取时间戳
-                start_str, end_str = line.split(" --> ")
-                start, end = srt_tstamp(start_str), srt_tstamp(end_str)
-                text_trange = Timerange(start + time_offset, end - start)
-
-                index += 1
-                read_state = "content"
-            elif read_state == "content":
-                # 内容结束, 生成片段
-                if len(line) == 0:
-                    __add_text_segment(text.strip(), text_trange)
-
-                    text = ""
-                    read_state = "index"
-                else:
-                    text += line + "\n"
-                index += 1
-
-        # 添加最后一个片段
-        if len(text) > 0:
-            __add_text_segment(text.strip(), text_trange)
+                self.materials._filter_ids.add(effect.global_id)
+            segments.append(seg)
+
+        def __check_gap(gap_start: int, gap_end: int) -> None:
+            # 正则只匹配格式正确的字幕块, 块之间或末尾残留非空内容说明有字幕块格式错误
+            gap = srt_text[gap_start:gap_end]
+            if gap.strip():
+                bad_offset = gap_start + len(gap) - len(gap.lstrip())
+                bad_line = srt_text[bad_offset:].split("\n", 1)[0].strip()
+                raise ValueError("Malformed SRT block at line %d: '%s'" % (srt_text.count("\n", 0, bad_offset) + 1, bad_line))
+
+        pos = 0
+        for match in _SRT_BLOCK_RE.finditer(srt_text):
+            __check_gap(pos, match.start())
+            pos = match.end()
+            start_str, end_str, content = match.groups()
+            start, end = srt_tstamp(start_str), srt_tstamp(end_str)
+            text = "\n".join(line.strip() for line in content.splitlines())
+            __add_text_segment(text.strip(), Timerange(start + time_offset, end - start))
+        __check_gap(pos, len(srt_text))
+
+        # 一次性加入轨道, 只需进行一次重叠检查
+        self.add_segments(segments, track_name)
 
         return self
 
@@ -678,17 +863,25 @@ class Script_file:
             extra_refs: List[str] = segment.get("extra_material_refs", [])
             material_ids.update(extra_refs)
 
-        # 复制素材
+        # 复制素材, 全部找到后即停止扫描
+        source_file._flush_text_contents()
         for material_type, material_list in source_file.imported_materials.items():
+            if not material_ids:
+                break
             for material in material_list:
-                if material.get("id") in material_ids:
-                    self.imported_materials[material_type].append(deepcopy(material))
-                    material_ids.remove(material.get("id"))
+                material_id = material.get("id")
+                if material_id in material_ids:
+                    self.imported_materials[material_type].append(util.json_clone(material))
+                    material_ids.discard(material_id)
+                    if not material_ids:
+                        break
 
         assert len(material_ids) == 0, "未找到以下素材: %s" % material_ids
 
         # 更新总时长
-        self.duration = max(self.duration, track.end_time)
+        end_time = track.end_time
+        if end_time > self.duration:
+            self.duration = end_time
 
         return self
 
@@ -776,6 +969,34 @@ class Script_file:
         # TODO: 更新总长
         return self
 
+    def _imported_material_index(self, material_type: str) -> Dict[str, Dict[str, Any]]:
+        """获取指定类型导入素材的id索引, 同一id有多个素材时取第一个"""
+        materials = self.imported_materials.get(material_type, [])
+        cached = self._imported_material_indexes.get(material_type)
+        if cached is None or cached[0] is not materials or cached[1] != len(materials):
+            index: Dict[str, Dict[str, Any]] = {}
+            for mat in materials:
+                index.setdefault(mat["id"], mat)
+            cached = (materials, len(materials), index)
+            self._imported_material_indexes[material_type] = cached
+        return cached[2]
+
+    def _get_parsed_text_content(self, mat: Dict[str, Any]) -> Dict[str, Any]:
+        """获取文本素材解析后的content, 多次替换同一素材时只解析一次"""
+        cached = self._parsed_text_contents.get(mat["id"])
+        if cached is not None and cached[0] is mat:
+            return cached[1]
+        content = orjson.loads(mat["content"])
+        self._parsed_text_contents[mat["id"]] = (mat, content)
+        return content
+
+    def _flush_text_contents(self) -> None:
+        """将`replace_text`修改过的文本content写回对应素材"""
+        for mat, content in self._parsed_text_contents.values():
+            # orjson直接输出UTF-8且不转义非ASCII字符, 与ensure_ascii=False一致
+            mat["content"] = orjson.dumps(content).decode("utf-8")
+        self._parsed_text_contents.clear()
+
     def replace_text(self, track: EditableTrack, segment_index: int, text: Union[str, List[str]],
                      recalc_style: bool = True) -> "Script_file":
         """替换指定文本轨道上指定片段的文字内容, 支持普通文本片段或文本模板片段
@@ -798,42 +1019,40 @@ class Script_file:
 
         def __recalc_style_range(old_len: int, new_len: int, styles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             """调整字体样式分布"""
+            if old_len == new_len:
+                return [style for style in styles if style["range"][0] != style["range"][1]]
+
             new_styles: List[Dict[str, Any]] = []
+            bias = old_len - 1
             for style in styles:
-                start = math.ceil(style["range"][0] / old_len * new_len)
-                end = math.ceil(style["range"][1] / old_len * new_len)
+                # 整数形式的向上取整, 即ceil(x / old_len * new_len)
+                old_start, old_end = style["range"]
+                start = (old_start * new_len + bias) // old_len
+                end = (old_end * new_len + bias) // old_len
                 style["range"] = [start, end]
                 if start != end:
                     new_styles.append(style)
             return new_styles
 
-        replaced: bool = False
         material_id: str = track.segments[segment_index].material_id
+        text_index = self._imported_material_index("texts")
         # 尝试在文本素材中替换
-        for mat in self.imported_materials["texts"]:
-            if mat["id"] != material_id:
-                continue
-
+        mat = text_index.get(material_id)
+        if mat is not None:
             if isinstance(text, list):
                 if len(text) != 1:
                     raise ValueError(f"正常文本片段只能有一个文字内容, 但替换内容是 {text}")
                 text = text[0]
 
-            content = json.loads(mat["content"])
+            content = self._get_parsed_text_content(mat)
             if recalc_style:
                 content["styles"] = __recalc_style_range(len(content["text"]), len(text), content["styles"])
             content["text"] = text
-            mat["content"] = json.dumps(content, ensure_ascii=False)
-            replaced = True
-            break
-        if replaced:
             return self
 
         # 尝试在文本模板中替换
-        for template in self.imported_materials["text_templates"]:
-            if template["id"] != material_id:
-                continue
-
+        template = self._imported_material_index("text_templates").get(material_id)
+        if template is not None:
             resources = template["text_info_resources"]
             if isinstance(text, str):
                 text = [text]
@@ -841,89 +1060,91 @@ class Script_file:
                 raise ValueError(f"文字模板'{template['name']}'只有{len(resources)}段文本, 但提供了{len(text)}段替换内容")
 
             for sub_material_id, new_text in zip(map(lambda x: x["text_material_id"], resources), text):
-                for mat in self.imported_materials["texts"]:
-                    if mat["id"] != sub_material_id:
-                        continue
-
-                    if isinstance(mat["content"], str):
-                        mat["content"] = new_text
-                    else:
-                        content = json.loads(mat["content"])
-                        if recalc_style:
-                            content["styles"] = __recalc_style_range(len(content["text"]), len(new_text), content["styles"])
-                        content["text"] = new_text
-                        mat["content"] = json.dumps(content, ensure_ascii=False)
-                    break
-            replaced = True
-            break
-
-        assert replaced, f"未找到指定片段的素材 {material_id}"
+                mat = text_index.get(sub_material_id)
+                if mat is None:
+                    continue
 
-        return self
+                if isinstance(mat["content"], str):
+                    mat["content"] = new_text
+                    self._parsed_text_contents.pop(sub_material_id, None)
+                else:
+                    content = self._get_parsed_text_content(mat)
+                    if recalc_style:
+                        content["styles"] = __recalc_style_range(len(content["text"]), len(new_text), content["styles"])
+                    content["text"] = new_text
+            return self
+
+        raise AssertionError(f"未找到指定片段的素材 {material_id}")
 
     def inspect_material(self) -> None:
         """输出草稿中导入的贴纸、文本气泡以及花字素材的元数据"""
-        print("贴纸素材:")
+        lines = ["贴纸素材:"]
         for sticker in self.imported_materials["stickers"]:
-            print("\tResource id: %s '%s'" % (sticker["resource_id"], sticker.get("name", "")))
+            lines.append("\tResource id: %s '%s'" % (sticker["resource_id"], sticker.get("name", "")))
 
-        print("文字气泡效果:")
+        # 一次遍历同时收集文字气泡和花字
+        text_shapes: List[str] = []
+        text_effects: List[str] = []
         for effect in self.imported_materials["effects"]:
-            if effect["type"] == "text_shape":
-                print("\tEffect id: %s ,Resource id: %s '%s'" %
-                      (effect["effect_id"], effect["resource_id"], effect.get("name", "")))
+            effect_type = effect["type"]
+            if effect_type == "text_shape":
+                text_shapes.append("\tEffect id: %s ,Resource id: %s '%s'" %
+                                   (effect["effect_id"], effect["resource_id"], effect.get("name", "")))
+            elif effect_type == "text_effect":
+                text_effects.append("\tResource id: %s '%s'" % (effect["resource_id"], effect.get("name", "")))
+
+        lines.append("文字气泡效果:")
+        lines.extend(text_shapes)
+        lines.append("花字效果:")
+        lines.extend(text_effects)
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
+
+    def _build_content(self) -> Dict[str, Any]:
+        """将当前草稿状态写入`self.content`并返回之"""
+        self._flush_text_contents()
 
-        print("花字效果:")
-        for effect in self.imported_materials["effects"]:
-            if effect["type"] == "text_effect":
-                print("\tResource id: %s '%s'" % (effect["resource_id"], effect.get("name", "")))
-
-    def dumps(self) -> str:
-        """将草稿文件内容导出为JSON字符串"""
         self.content["fps"] = self.fps
         self.content["duration"] = self.duration
         self.content["canvas_config"] = {"width": self.width, "height": self.height, "ratio": "original"}
         self.content["materials"] = self.materials.export_json()
 
-        self.content["last_modified_platform"] = {
-            "app_id": 359289,
-            "app_source": "cc",
-            "app_version": "6.5.0",
-            "device_id": "c4ca4238a0b923820dcc509a6f75849b",
-            "hard_disk_id": "307563e0192a94465c0e927fbc482942",
-            "mac_address": "c3371f2d4fb02791c067ce44d8fb4ed5",
-            "os": "mac",
-            "os_version": "15.5"
-        }
-
-        self.content["platform"] = {
-            "app_id": 359289,
-            "app_source": "cc",
-            "app_version": "6.5.0",
-            "device_id": "c4ca4238a0b923820dcc509a6f75849b",
-            "hard_disk_id": "307563e0192a94465c0e927fbc482942",
-            "mac_address": "c3371f2d4fb02791c067ce44d8fb4ed5",
-            "os": "mac",
-            "os_version": "15.5"
-        }
+        self.content["last_modified_platform"] = _PLATFORM_META
+        self.content["platform"] = _PLATFORM_META
 
         # 合并导入的素材
+        materials = self.content["materials"]
         for material_type, material_list in self.imported_materials.items():
-            if material_type not in self.content["materials"]:
-                self.content["materials"][material_type] = material_list
+            existing = materials.get(material_type)
+            if existing is None:
+                materials[material_type] = material_list
             else:
-                self.content["materials"][material_type].extend(material_list)
+                existing.extend(material_list)
 
         # 对轨道排序并导出
         track_list: List[Base_track] = list(self.tracks.values())
         track_list.extend(self.imported_tracks)
-        track_list.sort(key=lambda track: track.render_index)
+        # 两部分通常各自已按渲染顺序排列, TimSort会识别这两段有序序列并以近似线性的代价归并
+        track_list.sort(key=attrgetter("render_index"))
         self.content["tracks"] = [track.export_json() for track in track_list]
 
-        return json.dumps(self.content, ensure_ascii=False, indent=4)
+        return self.content
+
+    def dumps(self) -> str:
+        """将草稿文件内容导出为JSON字符串(4空格缩进, 与写入草稿文件的格式一致)"""
+        return json.dumps(self._build_content(), ensure_ascii=False, indent=4)
+
+    def dumps_bytes(self) -> bytes:
+        """将草稿文件内容导出为UTF-8编码的紧凑JSON字节串, 供程序内部解析使用, 优先使用orjson, 无法序列化时回退到标准库json"""
+        content = self._build_content()
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return json.dumps(content, ensure_ascii=False).encode("utf-8")
 
     def dump(self, file_path: str) -> None:
         """将草稿文件内容写入文件"""
+        # 有意保持与剪映一致的4空格缩进文本JSON, 不改用orjson紧凑字节输出; orjson仅用于dumps_bytes的程序内部解析
         with open(file_path, "w", encoding="utf-8") as f:
             f.write(self.dumps())
 
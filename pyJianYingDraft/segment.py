@@ -88,6 +88,11 @@ class Speed:
         self.global_id = uuid.uuid4().hex
         self.speed = speed
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Speed":
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
     def export_json(self) -> Dict[str, Any]:
         return {
             "curve_speed": None,
@@ -141,6 +146,12 @@ class Clip_settings:
         self.scale_x, self.scale_y = scale_x, scale_y
         self.transform_x, self.transform_y = transform_x, transform_y
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Clip_settings":
+        # 属性均为不可变值, 浅拷贝即等价于深拷贝, 省去deepcopy逐属性分发的开销
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
     def export_json(self) -> Dict[str, Any]:
         clip_settings_json = {
             "alpha": self.alpha,
@@ -75,6 +75,12 @@ class Text_style:
         self.letter_spacing = letter_spacing
         self.line_spacing = line_spacing
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Text_style":
+        # 属性均为不可变值, 浅拷贝即等价于深拷贝, 省去deepcopy逐属性分发的开销
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
 class Text_border:
     """文本描边的参数"""
 
@@ -96,6 +102,11 @@ class Text_border:
         self.color = color
         self.width = width / 100.0 * 0.2  # 此映射可能不完全正确
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Text_border":
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
     def export_json(self) -> Dict[str, Any]:
         """导出JSON数据, 放置在素材content的styles中"""
         return {
@@ -153,6 +164,11 @@ class Text_background:
         self.horizontal_offset = horizontal_offset * 2 - 1
         self.vertical_offset = vertical_offset * 2 - 1
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Text_background":
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
     def export_json(self) -> Dict[str, Any]:
         """生成子JSON数据, 在Text_segment导出时合并到其中"""
         return {
@@ -180,6 +196,11 @@ class TextBubble:
         self.effect_id = effect_id
         self.resource_id = resource_id
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "TextBubble":
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
     def export_json(self) -> Dict[str, Any]:
         return {
             "apply_target_type": 0,
@@ -259,25 +280,47 @@ class Text_segment(Visual_segment):
         self.fixed_width = fixed_width
         self.fixed_height = fixed_height
 
+    @staticmethod
+    def build_template_snapshot(template: "Text_segment") -> Dict[str, Any]:
+        """提取模板片段中会被复制到新片段的字段, 以便用同一模板批量创建片段时只需提取一次
+
+        返回的字典中的对象与模板共享, 修改前应先复制; 调用方可直接替换其中的字段以覆盖模板设置
+        """
+        return {
+            "style": template.style,
+            "clip_settings": template.clip_settings,
+            "border": template.border,
+            "background": template.background,
+            "font": template.font,
+            "animations_instance": template.animations_instance,
+            "bubble": (template.bubble.effect_id, template.bubble.resource_id) if template.bubble else None,
+            "effect": template.effect.effect_id if template.effect else None,
+        }
+
     @classmethod
-    def create_from_template(cls, text: str, timerange: Timerange, template: "Text_segment") -> "Text_segment":
-        """根据模板创建新的文本片段, 并指定其文本内容"""
-        new_segment = cls(text, timerange, style=deepcopy(template.style), clip_settings=deepcopy(template.clip_settings),
-                          border=deepcopy(template.border), background=deepcopy(template.background))
-        new_segment.font = deepcopy(template.font)
+    def create_from_snapshot(cls, text: str, timerange: Timerange, snapshot: Dict[str, Any]) -> "Text_segment":
+        """根据`build_template_snapshot`提取的模板字段创建新的文本片段, 并指定其文本内容"""
+        new_segment = cls(text, timerange, style=deepcopy(snapshot["style"]), clip_settings=deepcopy(snapshot["clip_settings"]),
+                          border=deepcopy(snapshot["border"]), background=deepcopy(snapshot["background"]))
+        new_segment.font = deepcopy(snapshot["font"])
 
         # 处理动画等
-        if template.animations_instance:
-            new_segment.animations_instance = deepcopy(template.animations_instance)
+        if snapshot["animations_instance"]:
+            new_segment.animations_instance = deepcopy(snapshot["animations_instance"])
             new_segment.animations_instance.animation_id = uuid.uuid4().hex
             new_segment.extra_material_refs.append(new_segment.animations_instance.animation_id)
-        if template.bubble:
-            new_segment.add_bubble(template.bubble.effect_id, template.bubble.resource_id)
-        if template.effect:
-            new_segment.add_effect(template.effect.effect_id)
+        if snapshot["bubble"]:
+            new_segment.add_bubble(*snapshot["bubble"])
+        if snapshot["effect"]:
+            new_segment.add_effect(snapshot["effect"])
 
         return new_segment
 
+    @classmethod
+    def create_from_template(cls, text: str, timerange: Timerange, template: "Text_segment") -> "Text_segment":
+        """根据模板创建新的文本片段, 并指定其文本内容"""
+        return cls.create_from_snapshot(text, timerange, cls.build_template_snapshot(template))
+
     def add_animation(self, animation_type: Union[Text_intro, Text_outro, Text_loop_anim,
                                                   CapCut_Text_intro, CapCut_Text_outro, CapCut_Text_loop_anim],
                       duration: Union[str, float] = 500000) -> "Text_segment":
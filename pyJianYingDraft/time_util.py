@@ -1,7 +1,7 @@
 """定义时间范围类以及与时间相关的辅助函数"""
 
 from typing import Union
-from typing import Dict
+from typing import Dict, Any
 
 SEC = 1000000
 """一秒=1e6微秒"""
@@ -59,6 +59,10 @@ class Timerange:
         """结束时间, 单位为微秒"""
         return self.start + self.duration
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Timerange":
+        # 仅含两个整数, 直接构造新对象即可
+        return self.__class__(self.start, self.duration)
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Timerange):
             return False
@@ -195,6 +195,39 @@ class Track(Base_track, Generic[Seg_type]):
         self.segments.append(segment)
         return self
 
+    def add_segments(self, segments: List[Seg_type]) -> "Track[Seg_type]":
+        """向轨道中批量添加片段, 要求同`add_segment`, 任一片段不满足要求时不添加任何片段
+
+        重叠检查通过按起始时间排序后的一次扫描完成, 避免逐个添加时每次都遍历已有片段
+
+        Args:
+            segments (List[Seg_type]): 要添加的片段列表
+
+        Raises:
+            `TypeError`: 新片段类型与轨道类型不匹配
+            `SegmentOverlap`: 新片段与现有片段或其它新片段重叠
+        """
+        for segment in segments:
+            if not isinstance(segment, self.accept_segment_type):
+                raise TypeError("New segment (%s) is not of the same type as the track (%s)" % (type(segment), self.accept_segment_type))
+
+        # (起始时间, 结束时间, 是否为新片段, 片段)
+        entries = [(seg.target_timerange.start, seg.target_timerange.end, False, seg) for seg in self.segments]
+        entries.extend((seg.target_timerange.start, seg.target_timerange.end, True, seg) for seg in segments)
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+
+        # 维护已扫描片段中最晚的结束时间, 起始时间早于它的片段即与之重叠
+        max_end, max_end_is_new = None, False
+        for start, end, is_new, seg in entries:
+            if max_end is not None and start < max_end and (is_new or max_end_is_new):
+                raise SegmentOverlap("New segment overlaps with existing segment [start: {}, end: {}]"
+                                     .format(seg.target_timerange.start, seg.target_timerange.end))
+            if max_end is None or end > max_end:
+                max_end, max_end_is_new = end, is_new
+
+        self.segments.extend(segments)
+        return self
+
     def export_json(self) -> Dict[str, Any]:
         # 为每个片段写入render_index
         segment_exports = [seg.export_json() for seg in self.segments]
@@ -1,12 +1,17 @@
 """辅助函数，主要与模板模式有关"""
 
 import inspect
+import orjson
 
 from typing import Union, Type
 from typing import List, Dict, Any
 
 JsonExportable = Union[int, float, bool, str, List["JsonExportable"], Dict[str, "JsonExportable"]]
 
+def json_clone(data: JsonExportable) -> JsonExportable:
+    """深拷贝纯JSON结构的数据, 借助orjson序列化往返实现, 比`deepcopy`快得多"""
+    return orjson.loads(orjson.dumps(data))
+
 def provide_ctor_defaults(cls: Type) -> Dict[str, Any]:
     """为构造函数提供默认值，以绕开构造函数的参数限制"""
 
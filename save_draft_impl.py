@@ -67,6 +67,8 @@ def save_draft_background(draft_id, task_id):
             logger.error(f"Draft {draft_id} does not exist in cache, task {task_id} failed.")
             return
             
+        # DRAFT_CACHE returns a private copy; replace_path, media metadata and duration
+        # changes below stay local to this save and are never written back to the cache
         script = DRAFT_CACHE[draft_id]
         logger.info(f"Successfully retrieved draft {draft_id} from cache.")
         
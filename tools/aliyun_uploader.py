@@ -1,12 +1,28 @@
+import io
 import os
 import time
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, Dict, Any
 import oss2
 
+# 处理相对导入问题
+try:
+    from .upload_utils import log_upload_error
+except ImportError:
+    from upload_utils import log_upload_error
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 超过该大小的文件使用分片并发上传
+MULTIPART_THRESHOLD = 10 * 1024 * 1024
+# 分片大小
+MULTIPART_PART_SIZE = 4 * 1024 * 1024
+# 分片上传并发线程数
+MULTIPART_NUM_THREADS = 4
+
 class AliyunUploader:
     """阿里云OSS上传工具类"""
     
@@ -46,6 +62,9 @@ class AliyunUploader:
         self.external_endpoint = self._get_external_endpoint_with_protocol()
         logger.info(f"使用OSS端点: {self.external_endpoint} (原始端点: {self.endpoint})")
         
+        # 端点在实例生命周期内不变，预先拼好外网访问URL前缀，上传成功后直接拼接key
+        self._external_url_prefix = f"https://{self.bucket_name}.{self._get_external_endpoint()}/"
+        
         # 创建Bucket对象使用外部端点，确保可以从任何网络访问
         self.bucket = oss2.Bucket(self.auth, self.external_endpoint, self.bucket_name)
     
@@ -93,7 +112,7 @@ class AliyunUploader:
         """
         # 检查文件是否存在
         if not os.path.exists(file_path):
-            logger.error(f"文件不存在: {file_path}")
+            logger.error("文件不存在: %s", file_path)
             return False, f"文件不存在: {file_path}", {}
         
         try:
@@ -106,34 +125,128 @@ class AliyunUploader:
             
             # 上传文件
             logger.info(f"开始上传文件到阿里云OSS: {file_path} -> {file_key}")
-            result = self.bucket.put_object_from_file(file_key, file_path)
+            if os.path.getsize(file_path) >= MULTIPART_THRESHOLD:
+                # 大文件分片并发上传，由SDK按路径打开文件，断点信息记录在临时目录中
+                result = oss2.resumable_upload(
+                    self.bucket, file_key, file_path,
+                    store=oss2.ResumableStore(root=tempfile.gettempdir()),
+                    multipart_threshold=MULTIPART_THRESHOLD,
+                    part_size=MULTIPART_PART_SIZE,
+                    num_threads=MULTIPART_NUM_THREADS
+                )
+            else:
+                with open(file_path, 'rb') as f:
+                    # 直接传入文件对象，由SDK分块流式发送，Content-Type仍按key的扩展名推断
+                    result = self.bucket.put_object(file_key, f)
+            
+            return self._build_result(result, file_key, internal_or_external)
+                
+        except Exception as e:
+            error_msg = f"上传文件失败: {str(e)}"
+            log_upload_error(logger, error_msg, e)
+            return False, error_msg, {}
+    
+    def upload_bytes(
+        self,
+        data: bytes,
+        file_name: str,
+        key_prefix: str = "uploads",
+        internal_or_external: Optional[str] = "external",
+        file_key: Optional[str] = None
+    ) -> Tuple[bool, str, Dict[Any, Any]]:
+        """
+        直接上传内存中的数据到阿里云OSS，无需先写入临时文件
+        
+        Args:
+            data: 文件二进制数据
+            file_name: 文件名，不提供file_key时与时间戳一起组成文件key
+            key_prefix: 文件在OSS中的前缀路径，默认为 "uploads"
+            file_key: 自定义文件名，不提供则使用时间戳+file_name
+            
+        Returns:
+            Tuple[bool, str, Dict]: (是否成功, URL或错误信息, 详细结果信息)
+        """
+        try:
+            if not file_key:
+                file_key = f"{key_prefix}/{int(time.time())}_{file_name}"
+            else:
+                file_key = f"{key_prefix}/{file_key}"
             
-            # 检查上传是否成功
-            if result.status == 200:
-                # 构建访问URL（始终使用外网地址）
-                if internal_or_external == "external":
-                    external_endpoint = self._get_external_endpoint()
-                    url = f"https://{self.bucket_name}.{external_endpoint}/{file_key}"
-                else:
-                    url = f"oss://{self.bucket_name}.oss-cn-beijing.aliyuncs.com/{file_key}"
-                logger.info(f"文件上传成功: {url}")
-                return True, url, {
-                    'key': file_key,
-                    'etag': result.etag,
-                    'request_id': result.request_id
-                }
+            logger.info(f"开始上传内存数据到阿里云OSS: {len(data)} 字节 -> {file_key}")
+            if len(data) >= MULTIPART_THRESHOLD:
+                result = self._multipart_upload_bytes(file_key, data)
             else:
-                error_msg = f"上传失败: HTTP状态码 {result.status}"
-                logger.error(error_msg)
-                return False, error_msg, {}
+                result = self.bucket.put_object(file_key, data)
+            
+            return self._build_result(result, file_key, internal_or_external)
                 
         except Exception as e:
             error_msg = f"上传文件失败: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+            log_upload_error(logger, error_msg, e)
             return False, error_msg, {}
+    
+    def _multipart_upload_bytes(self, file_key: str, data: bytes):
+        """将内存中的大文件按 MULTIPART_PART_SIZE 分片并发上传，失败时取消分片上传"""
+        upload_id = self.bucket.init_multipart_upload(file_key).upload_id
         
-
-    #      
+        def upload_part(part_number: int, offset: int):
+            # 不切片复制分片数据，内存占用不随在途分片数增长：以 bytes 初始化的 BytesIO 共享其缓冲区，
+            # 由 SizedFileAdapter 限定读取范围、SDK 按块流式读取（SDK 的CRC校验只对 bytes 切片，不接受 memoryview）
+            stream = io.BytesIO(data)
+            stream.seek(offset)
+            part = self.bucket.upload_part(
+                file_key, upload_id, part_number,
+                oss2.utils.SizedFileAdapter(stream, min(MULTIPART_PART_SIZE, len(data) - offset))
+            )
+            return oss2.models.PartInfo(part_number, part.etag)
+        
+        try:
+            offsets = range(0, len(data), MULTIPART_PART_SIZE)
+            with ThreadPoolExecutor(max_workers=MULTIPART_NUM_THREADS) as executor:
+                parts = list(executor.map(upload_part, range(1, len(offsets) + 1), offsets))
+            return self.bucket.complete_multipart_upload(file_key, upload_id, parts)
+        except Exception:
+            try:
+                self.bucket.abort_multipart_upload(file_key, upload_id)
+            except Exception as e:
+                logger.warning(f"取消分片上传失败: {e}")
+            raise
+    
+    def _build_result(self, result, file_key: str, internal_or_external: Optional[str]) -> Tuple[bool, str, Dict[Any, Any]]:
+        """根据SDK返回结果构建 (是否成功, URL或错误信息, 详细结果信息)"""
+        if result.status == 200:
+            # 构建访问URL（始终使用外网地址）
+            if internal_or_external == "external":
+                url = self._external_url_prefix + file_key
+            else:
+                url = f"oss://{self.bucket_name}.oss-cn-beijing.aliyuncs.com/{file_key}"
+            logger.info(f"文件上传成功: {url}")
+            return True, url, {
+                'key': file_key,
+                'etag': result.etag,
+                'request_id': result.request_id
+            }
+        else:
+            error_msg = f"上传失败: HTTP状态码 {result.status}"
+            logger.error(error_msg)
+            return False, error_msg, {}
+    
+    def delete_file(self, file_key: str) -> bool:
+        """
+        删除阿里云OSS中的文件
+        
+        Args:
+            file_key: 文件key（含前缀路径）
+            
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            self.bucket.delete_object(file_key)
+            return True
+        except Exception as e:
+            logger.error(f"删除文件失败: {e}")
+            return False
     
     def upload_video(self, file_path: str) -> Tuple[bool, str, Dict[Any, Any]]:
         """
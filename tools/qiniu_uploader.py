@@ -1,13 +1,29 @@
+import io
 import os
 import time
 import logging
+import tempfile
+import threading
+import uuid
 import requests
 from typing import Optional, Tuple, Dict, Any
-from qiniu import Auth, put_file, etag, put_data
+from qiniu import Auth, BucketManager, put_file, put_data, put_stream, etag
 import qiniu
 
+# 处理相对导入问题
+try:
+    from .upload_utils import log_upload_error
+except ImportError:
+    from upload_utils import log_upload_error
+
 # 配置日志
 logger = logging.getLogger(__name__)
+
+# 空间级上传凭证的有效期（秒）
+TOKEN_EXPIRES = 7200
+# 剩余有效期不足该值（秒）时刷新凭证，保证取得凭证后开始的大文件分片上传至少有这么长时间可以完成
+TOKEN_REFRESH_MARGIN = 3600
+
 class QiniuUploader:
     """七牛云上传工具类"""
     
@@ -16,7 +32,8 @@ class QiniuUploader:
         access_key: Optional[str] = None, 
         secret_key: Optional[str] = None,
         bucket_name: Optional[str] = None,
-        domain: Optional[str] = None
+        domain: Optional[str] = None,
+        part_size: Optional[int] = None
     ):
         """
         初始化七牛云上传工具类
@@ -26,15 +43,29 @@ class QiniuUploader:
             secret_key: 七牛云私有密钥，默认从环境变量获取
             bucket_name: 七牛云存储空间名称，默认从环境变量获取
             domain: 七牛云绑定的域名，默认从环境变量获取
+            part_size: 分片上传的分片大小（字节），默认从环境变量 QINIU_PART_SIZE 获取，否则为4MB
         """
         # 优先使用传入的参数，否则从环境变量获取，最后使用默认值
         self.access_key = access_key or os.getenv('QINIU_ACCESS_KEY')
         self.secret_key = secret_key or os.getenv('QINIU_SECRET_KEY')
         self.bucket_name = bucket_name or os.getenv('QINIU_BUCKET_NAME')
         self.domain = domain or os.getenv('QINIU_DOMAIN')
+        self.part_size = part_size or int(os.getenv('QINIU_PART_SIZE', 4 * 1024 * 1024))
         
         # 创建鉴权对象
         self.auth = Auth(self.access_key, self.secret_key)
+        self.bucket_manager = BucketManager(self.auth)
+        
+        # 空间级上传凭证缓存，剩余有效期不足 TOKEN_REFRESH_MARGIN 时刷新
+        self._cached_token: Optional[str] = None
+        self._token_expiry = 0.0
+        self._token_lock = threading.Lock()
+        
+        # 复用下载连接（keep-alive），避免每次从URL下载都重新建立TCP/TLS连接
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
     
     def upload_file(
         self, 
@@ -70,23 +101,34 @@ class QiniuUploader:
         """上传本地文件到七牛云"""
         # 检查文件是否存在
         if not os.path.exists(file_path):
-            logger.error(f"文件不存在: {file_path}")
+            logger.error("文件不存在: %s", file_path)
             return False, f"文件不存在: {file_path}", {}
         
         try:
             # 生成上传文件的key（文件名）
+            overwrite = bool(file_key)
             if not file_key:
                 file_name = os.path.basename(file_path)
-                file_key = f"{key_prefix}/{int(time.time())}_{file_name}"
+                file_key = self._generate_key(key_prefix, file_name)
             else:
                 file_key = f"{key_prefix}/{file_key}"
+                # 指定了文件名时，若云端已有内容相同的文件则直接复用
+                existing = self._stat_if_same(file_key, file_path)
+                if existing is not None:
+                    url = f"https://{self.domain}/{file_key}"
+                    logger.info(f"云端已存在相同文件，跳过上传: {url}")
+                    return True, url, existing
             
             # 生成上传 Token
-            token = self.auth.upload_token(self.bucket_name, file_key)
+            token = self._get_token(file_key if overwrite else None)
             
             # 上传文件
             logger.info(f"开始上传本地文件到七牛云: {file_path} -> {file_key}")
-            ret, info = put_file(token, file_key, file_path)
+            # 超过SDK阈值（4MB）的文件使用分片上传v2，逐片读取文件而不是整体载入内存
+            ret, info = put_file(
+                token, file_key, file_path,
+                version='v2', part_size=self.part_size, bucket_name=self.bucket_name
+            )
             
             # 检查上传是否成功
             if ret and ret['key'] == file_key:
@@ -95,14 +137,105 @@ class QiniuUploader:
                 logger.info(f"文件上传成功: {url}")
                 return True, url, ret
             else:
-                logger.error(f"文件上传失败: {info}")
+                logger.error("文件上传失败: %s", info)
                 return False, f"上传失败: {info}", {}
                 
         except Exception as e:
             error_msg = f"上传文件失败: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+            log_upload_error(logger, error_msg, e)
             return False, error_msg, {}
     
+    def upload_bytes(
+        self,
+        data: bytes,
+        file_name: str,
+        key_prefix: str = "uploads",
+        file_key: Optional[str] = None
+    ) -> Tuple[bool, str, Dict[Any, Any]]:
+        """
+        直接上传内存中的数据到七牛云，无需先写入临时文件
+        
+        Args:
+            data: 文件二进制数据
+            file_name: 文件名，不提供file_key时与时间戳一起组成文件key
+            key_prefix: 文件在七牛云中的前缀路径，默认为 "uploads"
+            file_key: 自定义文件名，不提供则使用时间戳+file_name
+            
+        Returns:
+            Tuple[bool, str, Dict]: (是否成功, URL或错误信息, 详细结果信息)
+        """
+        try:
+            overwrite = bool(file_key)
+            if not file_key:
+                file_key = self._generate_key(key_prefix, file_name)
+            else:
+                file_key = f"{key_prefix}/{file_key}"
+            
+            token = self._get_token(file_key if overwrite else None)
+            
+            logger.info(f"开始上传内存数据到七牛云: {len(data)} 字节 -> {file_key}")
+            if len(data) > self.part_size:
+                # 大文件使用分片上传v2；BytesIO 与 data 共享缓冲区，不会复制数据
+                ret, info = put_stream(
+                    token, file_key, io.BytesIO(data), file_name, len(data),
+                    version='v2', part_size=self.part_size, bucket_name=self.bucket_name
+                )
+            else:
+                ret, info = put_data(token, file_key, data)
+            
+            # 检查上传是否成功
+            if ret and ret['key'] == file_key:
+                url = f"https://{self.domain}/{file_key}"
+                logger.info(f"文件上传成功: {url}")
+                return True, url, ret
+            else:
+                logger.error("文件上传失败: %s", info)
+                return False, f"上传失败: {info}", {}
+                
+        except Exception as e:
+            error_msg = f"上传文件失败: {str(e)}"
+            log_upload_error(logger, error_msg, e)
+            return False, error_msg, {}
+    
+    @staticmethod
+    def _generate_key(key_prefix: str, file_name: str) -> str:
+        """
+        生成新文件的key：时间戳加随机后缀，同一秒内上传同名文件也不会冲突
+        （缓存的空间级凭证不能覆盖已有文件）
+        """
+        return f"{key_prefix}/{int(time.time())}_{uuid.uuid4().hex[:8]}_{file_name}"
+    
+    def _get_token(self, file_key: Optional[str] = None) -> str:
+        """
+        获取上传凭证
+        
+        Args:
+            file_key: 需要覆盖上传的文件名；不提供时返回缓存的空间级凭证（只能新增文件，不能覆盖）
+        """
+        if file_key:
+            return self.auth.upload_token(self.bucket_name, file_key)
+        with self._token_lock:
+            now = time.time()
+            if self._cached_token is None or now >= self._token_expiry:
+                self._cached_token = self.auth.upload_token(self.bucket_name, expires=TOKEN_EXPIRES)
+                self._token_expiry = now + TOKEN_EXPIRES - TOKEN_REFRESH_MARGIN
+            return self._cached_token
+    
+    def _stat_if_same(self, file_key: str, file_path: str) -> Optional[Dict[Any, Any]]:
+        """
+        检查云端是否已有与本地文件内容相同的同名文件
+        
+        Returns:
+            Optional[Dict]: 内容相同时返回与上传结果格式一致的信息，否则返回None
+        """
+        try:
+            ret, info = self.bucket_manager.stat(self.bucket_name, file_key)
+            if ret and ret.get('hash') == etag(file_path):
+                return {'key': file_key, 'hash': ret['hash']}
+        except Exception as e:
+            logger.warning(f"查询云端文件信息失败，继续上传: {e}")
+        return None
+    
     def _upload_from_url(
         self, 
         url: str, 
@@ -110,30 +243,36 @@ class QiniuUploader:
         file_key: Optional[str] = None
     ) -> Tuple[bool, str, Dict[Any, Any]]:
         """从URL下载文件并上传到七牛云"""
+        temp_file_path = None
         try:
-            # 下载文件内容
+            # 分块下载到临时文件，避免将整个文件读入内存
             logger.info(f"从URL下载文件: {url}")
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # 获取文件数据
-            file_data = response.content
+            with self._session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                fd, temp_file_path = tempfile.mkstemp()
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
             
             # 从URL中提取文件名
+            overwrite = bool(file_key)
             if not file_key:
                 file_name = url.split('/')[-1].split('?')[0]  # 移除查询参数
                 if not file_name or '.' not in file_name:
                     file_name = f"image_{int(time.time())}.png"  # 默认文件名
-                file_key = f"{key_prefix}/{int(time.time())}_{file_name}"
+                file_key = self._generate_key(key_prefix, file_name)
             else:
                 file_key = f"{key_prefix}/{file_key}"
             
             # 生成上传 Token
-            token = self.auth.upload_token(self.bucket_name, file_key)
+            token = self._get_token(file_key if overwrite else None)
             
             # 上传文件
             logger.info(f"开始上传URL文件到七牛云: {url} -> {file_key}")
-            ret, info = put_data(token, file_key, file_data)
+            ret, info = put_file(
+                token, file_key, temp_file_path,
+                version='v2', part_size=self.part_size, bucket_name=self.bucket_name
+            )
             
             # 检查上传是否成功
             if ret and ret['key'] == file_key:
@@ -142,13 +281,40 @@ class QiniuUploader:
                 logger.info(f"URL文件上传成功: {result_url}")
                 return True, result_url, ret
             else:
-                logger.error(f"URL文件上传失败: {info}")
+                logger.error("URL文件上传失败: %s", info)
                 return False, f"上传失败: {info}", {}
                 
         except Exception as e:
             error_msg = f"从URL上传文件失败: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+            log_upload_error(logger, error_msg, e)
             return False, error_msg, {}
+        finally:
+            # 清理临时文件
+            if temp_file_path and os.path.exists(temp_file_path):
+                try:
+                    os.remove(temp_file_path)
+                except Exception as e:
+                    logger.warning(f"清理临时文件失败: {e}")
+    
+    def delete_file(self, file_key: str) -> bool:
+        """
+        删除七牛云中的文件
+        
+        Args:
+            file_key: 文件key（含前缀路径）
+            
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            ret, info = self.bucket_manager.delete(self.bucket_name, file_key)
+            if info.status_code == 200:
+                return True
+            logger.error("删除文件失败: %s", info)
+            return False
+        except Exception as e:
+            logger.error(f"删除文件失败: {e}")
+            return False
     
     def upload_video(self, file_path: str) -> Tuple[bool, str, Dict[Any, Any]]:
         """
@@ -164,14 +330,13 @@ class QiniuUploader:
     
     def get_upload_token(self) -> str:
         """
-        获取七牛云上传token
+        获取七牛云上传token（空间级凭证，不能覆盖已有文件，剩余有效期至少 TOKEN_REFRESH_MARGIN 秒）
         
         Returns:
             str: 七牛云上传token，失败时返回None
         """
         try:
-            token = self.auth.upload_token(self.bucket_name)
-            return token
+            return self._get_token()
         except Exception as e:
             logger.error(f"获取七牛云上传token失败: {e}")
             return None
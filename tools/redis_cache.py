@@ -1,9 +1,16 @@
+import atexit
+import hashlib
 import json
 import logging
 import os
 import pickle
+import socket
+import threading
 import time
-from typing import Any, Dict, Optional, Union
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import redis
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
 import pyJianYingDraft as draft
@@ -11,9 +18,44 @@ import pyJianYingDraft as draft
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 序列化结果超过该大小时压缩后再写入 Redis
+COMPRESS_THRESHOLD = 4096
+# 压缩数据的前缀标记；pickle 数据总以 b"\x80" 开头，不会与之混淆，旧缓存仍可直接读取
+_COMPRESSED_MARKER = b"\x01"
+# 缓存统计信息的复用时间（秒）
+CACHE_INFO_TTL = 1.0
+# 记录最近写入内容摘要的键数上限
+LAST_HASH_MAX_SIZE = 1024
+# 异步批量写入失败后的重试退避：从1秒开始逐次翻倍，最长30秒
+WRITE_RETRY_BASE_DELAY = 1.0
+WRITE_RETRY_MAX_DELAY = 30.0
+
+# 内容未变时只续期：Redis 中保存的摘要与本次内容一致且数据键仍存在时，续期数据键、摘要键和索引并返回1，
+# 否则返回0由调用方完整写入。摘要与数据一起存放在 Redis 中，其他进程覆盖写入后摘要随之改变，不会误判为未变化
+# KEYS[1]: 数据键，KEYS[2]: 摘要键，KEYS[3]: 索引有序集合
+# ARGV[1]: 内容摘要，ARGV[2]: TTL（秒），ARGV[3]: 缓存键，ARGV[4]: 过期时间戳
+_RENEW_IF_UNCHANGED_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] or redis.call('EXPIRE', KEYS[1], ARGV[2]) == 0 then
+    return 0
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[3])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return 1
+"""
+
+# TCP keepalive：空闲30秒后开始探测，每5秒一次，连续3次无响应即判定连接已断开；
+# 系统默认要空闲2小时才开始探测，失效的连接会长时间留在连接池中
+_KEEPALIVE_OPTIONS = {
+    getattr(socket, name): value
+    for name, value in (("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 5), ("TCP_KEEPCNT", 3))
+    if hasattr(socket, name)
+}
+
 class RedisCache:
     def __init__(self, cache_prefix: str = "draft_cache", host: str = None, port: int = None,
-                 db: int = None, password: str = None, ttl_hours: int = 48, max_connections: int = 10):
+                 db: int = None, password: str = None, ttl_hours: int = 48, max_connections: int = 10,
+                 refresh_on_get: bool = True, unix_socket_path: str = None):
         """
         Redis缓存类，用于替代内存缓存
 
@@ -25,51 +67,106 @@ class RedisCache:
             password: Redis密码
             ttl_hours: 缓存过期时间（小时），默认48小时
             max_connections: 连接池最大连接数
+            refresh_on_get: 读取缓存命中时是否用 EXPIRE 续期，默认开启
+            unix_socket_path: Redis Unix 域套接字路径，设置后通过套接字连接本机 Redis，忽略 host/port
         """
         self.cache_prefix = cache_prefix
         self.ttl_seconds = ttl_hours * 3600  # 转换为秒
+        self.refresh_on_get = refresh_on_get
+        # 记录已缓存键的有序集合，score 为过期时间戳，用于 O(1) 统计缓存数量而无需遍历键空间
+        self.index_key = f"{cache_prefix}:index"
+        # 前缀不变，预先拼好，每次生成缓存键只需一次字符串拼接
+        self._key_prefix = f"{cache_prefix}:data:"
+        # 与数据键一一对应的内容摘要键
+        self._digest_prefix = f"{cache_prefix}:digest:"
+        # 缓存写入或删除时在该频道广播 "实例id:键"，其他进程据此淘汰本地副本
+        self.invalidation_channel = f"{cache_prefix}:invalidate"
+        self.instance_id = uuid.uuid4().hex
 
         # 从环境变量读取 Redis 配置，如果没有则使用默认值
         self.host = host or os.getenv('REDIS_HOST', 'localhost')
         self.port = port or int(os.getenv('REDIS_PORT', 6379))
         self.db = db if db is not None else int(os.getenv('REDIS_DB', 0))
         self.password = password or os.getenv('REDIS_PASSWORD')
+        self.unix_socket_path = unix_socket_path or os.getenv('REDIS_UNIX_SOCKET')
 
         logger.info(f"Redis缓存配置: host={self.host}, port={self.port}, db={self.db}, ttl={ttl_hours}小时")
 
         # 使用连接池来提高性能和稳定性
-        self.connection_pool = redis.ConnectionPool(
-            host=self.host,
-            port=self.port,
-            db=self.db,
-            password=self.password,
-            max_connections=max_connections,
-            socket_timeout=5,
-            socket_connect_timeout=5,
-            retry_on_timeout=True,
-            health_check_interval=30,
-            socket_keepalive=True,
-            socket_keepalive_options={}
-        )
+        if self.unix_socket_path:
+            # Redis 与服务部署在同一台机器时，Unix 域套接字省去 TCP 协议栈开销
+            logger.info(f"Redis缓存使用Unix域套接字: {self.unix_socket_path}")
+            self.connection_pool = redis.ConnectionPool(
+                connection_class=redis.UnixDomainSocketConnection,
+                path=self.unix_socket_path,
+                db=self.db,
+                password=self.password,
+                max_connections=max_connections,
+                socket_timeout=5,
+                socket_connect_timeout=5,
+                retry_on_timeout=True,
+                health_check_interval=30
+            )
+        else:
+            self.connection_pool = redis.ConnectionPool(
+                host=self.host,
+                port=self.port,
+                db=self.db,
+                password=self.password,
+                max_connections=max_connections,
+                socket_timeout=5,
+                socket_connect_timeout=5,
+                retry_on_timeout=True,
+                health_check_interval=30,
+                socket_keepalive=True,
+                socket_keepalive_options=_KEEPALIVE_OPTIONS
+            )
 
         self.redis_client = redis.Redis(connection_pool=self.connection_pool)
+        self._renew_if_unchanged_script = self.redis_client.register_script(_RENEW_IF_UNCHANGED_SCRIPT)
+        self._address = f"unix://{self.unix_socket_path}" if self.unix_socket_path else f"{self.host}:{self.port}"
 
         # 验证连接配置 - 如果失败直接抛异常
         try:
             self.redis_client.ping()
-            logger.info(f"Redis缓存客户端初始化完成，连接到 {self.host}:{self.port}, db={self.db}")
+            logger.info(f"Redis缓存客户端初始化完成，连接到 {self._address}, db={self.db}")
         except Exception as e:
             logger.error(f"Redis缓存客户端初始化失败: {str(e)}")
-            raise ConnectionError(f"无法连接到Redis服务器 {self.host}:{self.port} - {str(e)}")
+            raise ConnectionError(f"无法连接到Redis服务器 {self._address} - {str(e)}")
+
+        # 异步批量写入（write-behind），调用 enable_write_behind 后启用
+        self._write_thread: Optional[threading.Thread] = None
+        self._pending: Dict[str, bytes] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._write_event = threading.Event()
+        self._flush_interval = 0.005
+        self._write_batch_size = 100
+
+        # 本进程最近一次写入 Redis 的内容摘要（LRU），仅用于判断是否值得向 Redis 核对摘要，
+        # 是否真的未变化以 Redis 中保存的摘要为准
+        self._last_hash: "OrderedDict[str, bytes]" = OrderedDict()
+        self._hash_lock = threading.Lock()
+
+        # 最近一次成功获取的缓存统计信息及其时间，len(DRAFT_CACHE) 频繁调用时直接复用
+        self._info_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
 
     def _get_cache_key(self, key: str) -> str:
         """获取完整的缓存键名"""
-        return f"{self.cache_prefix}:data:{key}"
+        return self._key_prefix + key
+
+    def _get_digest_key(self, key: str) -> str:
+        """获取内容摘要的键名"""
+        return self._digest_prefix + key
 
     def _serialize_value(self, value: draft.Script_file) -> bytes:
         """序列化对象"""
         try:
-            return pickle.dumps(value)
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(data) > COMPRESS_THRESHOLD:
+                # 草稿中有大量重复的键名和id，最低压缩级别即可显著缩小体积且几乎不增加CPU开销
+                data = _COMPRESSED_MARKER + zlib.compress(data, 1)
+            return data
         except Exception as e:
             logger.error(f"序列化对象失败: {str(e)}")
             raise
@@ -77,30 +174,68 @@ class RedisCache:
     def _deserialize_value(self, data: bytes) -> draft.Script_file:
         """反序列化对象"""
         try:
+            if data[:1] == _COMPRESSED_MARKER:
+                data = zlib.decompress(data[1:])
             return pickle.loads(data)
         except Exception as e:
             logger.error(f"反序列化对象失败: {str(e)}")
             raise
 
-    def update_cache(self, key: str, value: draft.Script_file) -> bool:
+    def _remember_hash(self, key: str, digest: bytes) -> None:
+        """记录键最近一次写入内容的摘要"""
+        with self._hash_lock:
+            self._last_hash[key] = digest
+            self._last_hash.move_to_end(key)
+            while len(self._last_hash) > LAST_HASH_MAX_SIZE:
+                self._last_hash.popitem(last=False)
+
+    def _forget_hash(self, key: str) -> None:
+        """丢弃键的内容摘要"""
+        with self._hash_lock:
+            self._last_hash.pop(key, None)
+
+    def update_cache(self, key: str, value: draft.Script_file, serialized_value: Optional[bytes] = None) -> bool:
         """
         更新缓存（替代原有的 update_cache 函数）
 
         Args:
             key: 缓存键
             value: 要缓存的 draft.Script_file 对象
+            serialized_value: 调用方已通过 _serialize_value 序列化好的数据，提供时不再重复序列化
 
         Returns:
             bool: 操作是否成功
         """
         try:
             cache_key = self._get_cache_key(key)
-            serialized_value = self._serialize_value(value)
+            if serialized_value is None:
+                serialized_value = self._serialize_value(value)
+            digest = hashlib.blake2b(serialized_value, digest_size=16).digest()
+
+            with self._hash_lock:
+                unchanged = self._last_hash.get(key) == digest
+            if unchanged:
+                # 内容与本进程上次写入相同（如接口重试）时向 Redis 核对摘要，
+                # 期间未被其他进程覆盖且键仍存在则只续期，否则完整写入
+                renewed = self._renew_if_unchanged_script(
+                    keys=[cache_key, self._get_digest_key(key), self.index_key],
+                    args=[digest, self.ttl_seconds, key, time.time() + self.ttl_seconds]
+                )
+                if renewed:
+                    logger.debug(f"缓存内容未变化，仅续期: {key}, TTL: {self.ttl_seconds}秒")
+                    return True
 
-            # 直接操作，让连接池处理连接问题
-            success = self.redis_client.setex(cache_key, self.ttl_seconds, serialized_value)
+            # 数据、摘要与索引在同一个事务管道中写入，一次往返完成
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.setex(cache_key, self.ttl_seconds, serialized_value)
+            pipe.setex(self._get_digest_key(key), self.ttl_seconds, digest)
+            pipe.publish(self.invalidation_channel, f"{self.instance_id}:{key}")
+            pipe.zadd(self.index_key, {key: time.time() + self.ttl_seconds})
+            pipe.expire(self.index_key, self.ttl_seconds)
+            success = pipe.execute()[0]
 
             if success:
+                self._remember_hash(key, digest)
                 logger.debug(f"成功更新Redis缓存: {key}, TTL: {self.ttl_seconds}秒")
                 return True
             else:
@@ -117,6 +252,135 @@ class RedisCache:
             logger.error(f"更新Redis缓存失败 {key}: {str(e)}")
             return False
 
+    def enable_write_behind(self, flush_interval: float = 0.005, batch_size: int = 100) -> None:
+        """
+        启用异步批量写入：update_cache_async 只在本地登记序列化后的数据，
+        由后台线程每隔 flush_interval 秒合并同一键的多次写入，并用管道批量 SETEX
+
+        Args:
+            flush_interval: 攒批等待时间（秒）
+            batch_size: 每个管道最多包含的键数
+        """
+        if self._write_thread is not None:
+            return
+        self._flush_interval = flush_interval
+        self._write_batch_size = batch_size
+        self._write_thread = threading.Thread(target=self._write_behind_loop, name="redis-cache-writer", daemon=True)
+        self._write_thread.start()
+        # 进程退出前把剩余数据写入 Redis
+        atexit.register(self.flush)
+        logger.info(f"Redis缓存已启用异步批量写入，间隔: {flush_interval}秒，批大小: {batch_size}")
+
+    def update_cache_async(self, key: str, value: draft.Script_file, serialized_value: Optional[bytes] = None) -> bool:
+        """
+        异步更新缓存，未启用异步批量写入时等同于 update_cache
+
+        对象在调用线程中立即序列化，之后对草稿的修改不会影响本次写入的内容
+
+        Returns:
+            bool: 是否成功登记写入（不代表已写入 Redis）
+        """
+        if self._write_thread is None:
+            return self.update_cache(key, value, serialized_value)
+        if serialized_value is None:
+            try:
+                serialized_value = self._serialize_value(value)
+            except Exception as e:
+                logger.error(f"更新Redis缓存失败 {key}: {str(e)}")
+                return False
+        # 异步写入不经过摘要比较，丢弃旧摘要以免之后的同步写入被误判为未变化
+        self._forget_hash(key)
+        with self._pending_lock:
+            self._pending[key] = serialized_value
+        self._write_event.set()
+        return True
+
+    def flush(self) -> bool:
+        """
+        将所有待写入的数据同步写入 Redis
+
+        Returns:
+            bool: 是否全部写入成功；失败的键放回待写入队列并唤醒后台线程重试
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+
+            success = True
+
+            items = list(pending.items())
+            for start in range(0, len(items), self._write_batch_size):
+                batch = items[start:start + self._write_batch_size]
+                expire_at = time.time() + self.ttl_seconds
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, serialized_value in batch:
+                    pipe.setex(self._get_cache_key(key), self.ttl_seconds, serialized_value)
+                    pipe.setex(
+                        self._get_digest_key(key), self.ttl_seconds,
+                        hashlib.blake2b(serialized_value, digest_size=16).digest()
+                    )
+                pipe.zadd(self.index_key, {key: expire_at for key, _ in batch})
+                for key, _ in batch:
+                    pipe.publish(self.invalidation_channel, f"{self.instance_id}:{key}")
+                pipe.expire(self.index_key, self.ttl_seconds)
+                try:
+                    pipe.execute()
+                    logger.debug(f"批量写入Redis缓存: {len(batch)}个键")
+                except (ConnectionError, TimeoutError, RedisError) as e:
+                    logger.error(f"批量写入Redis缓存失败，{len(batch)}个键将稍后重试: {str(e)}")
+                    success = False
+                    with self._pending_lock:
+                        # 期间若有同一键的新写入，以新写入为准
+                        for key, serialized_value in batch:
+                            self._pending.setdefault(key, serialized_value)
+            if not success:
+                # 不依赖之后是否有新的写入，由后台线程退避后重试
+                self._write_event.set()
+            return success
+
+    def _write_behind_loop(self) -> None:
+        """后台写入线程：有新写入时等待一个攒批间隔后统一刷入，写入失败时按指数退避重试"""
+        retry_delay = 0.0
+        while True:
+            self._write_event.wait()
+            time.sleep(max(self._flush_interval, retry_delay))
+            self._write_event.clear()
+            try:
+                success = self.flush()
+            except Exception as e:
+                logger.error(f"异步写入Redis缓存失败: {str(e)}")
+                success = False
+            if success:
+                retry_delay = 0.0
+            else:
+                retry_delay = min(max(retry_delay * 2, WRITE_RETRY_BASE_DELAY), WRITE_RETRY_MAX_DELAY)
+
+    def subscribe_invalidations(self, callback: Callable[[str], None]):
+        """
+        订阅其他进程的缓存写入/删除通知，忽略本实例自己发出的通知
+
+        Args:
+            callback: 回调函数，参数为被其他进程修改或删除的缓存键
+
+        Returns:
+            后台监听线程，调用其 stop() 方法取消订阅
+        """
+        def _handle(message):
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            sender, _, key = data.partition(":")
+            if sender != self.instance_id:
+                # 其他进程已改写该键，本进程记录的摘要不再代表 Redis 中的内容
+                self._forget_hash(key)
+                callback(key)
+
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.invalidation_channel: _handle})
+        return pubsub.run_in_thread(sleep_time=1, daemon=True)
+
     def get_cache(self, key: str) -> Optional[draft.Script_file]:
         """
         获取缓存
@@ -127,17 +391,50 @@ class RedisCache:
         Returns:
             draft.Script_file or None: 缓存的对象，如果不存在或出错则返回None
         """
+        serialized_value = self.get_serialized(key)
+        if serialized_value is None:
+            return None
+        try:
+            return self._deserialize_value(serialized_value)
+        except Exception as e:
+            logger.error(f"从Redis缓存获取失败 {key}: {str(e)}")
+            return None
+
+    def get_serialized(self, key: str) -> Optional[bytes]:
+        """
+        获取缓存的序列化数据，不反序列化
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            bytes or None: 序列化数据，如果不存在或出错则返回None
+        """
         try:
+            if self._write_thread is not None:
+                # 优先读取尚未刷入 Redis 的最新写入，保证读到自己的写
+                with self._pending_lock:
+                    pending_value = self._pending.get(key)
+                if pending_value is not None:
+                    return pending_value
+
             cache_key = self._get_cache_key(key)
-            serialized_value = self.redis_client.get(cache_key)
+            if self.refresh_on_get:
+                # GET 与 EXPIRE 同批发送，一次往返完成读取和续期，常用草稿无需重新写入即可保持不过期
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(cache_key)
+                pipe.expire(cache_key, self.ttl_seconds)
+                pipe.zadd(self.index_key, {key: time.time() + self.ttl_seconds}, xx=True)
+                serialized_value = pipe.execute()[0]
+            else:
+                serialized_value = self.redis_client.get(cache_key)
 
             if serialized_value is None:
                 logger.debug(f"缓存中不存在键: {key}")
                 return None
 
-            value = self._deserialize_value(serialized_value)
             logger.debug(f"成功从Redis缓存获取: {key}")
-            return value
+            return serialized_value
 
         except (ConnectionError, TimeoutError) as e:
             logger.error(f"Redis连接问题，获取缓存失败 {key}: {str(e)}")
@@ -160,8 +457,17 @@ class RedisCache:
             bool: 操作是否成功
         """
         try:
+            # 先把待写入的数据刷入 Redis，避免删除后被迟到的写入复活
+            if self._write_thread is not None:
+                self.flush()
+            self._forget_hash(key)
             cache_key = self._get_cache_key(key)
-            result = self.redis_client.delete(cache_key)
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.delete(cache_key)
+            pipe.delete(self._get_digest_key(key))
+            pipe.zrem(self.index_key, key)
+            pipe.publish(self.invalidation_channel, f"{self.instance_id}:{key}")
+            result = pipe.execute()[0]
 
             success = result > 0  # 如果删除了至少一个键，认为成功
             if success:
@@ -181,17 +487,118 @@ class RedisCache:
             logger.error(f"删除Redis缓存失败 {key}: {str(e)}")
             return False
 
+    def exists(self, key: str) -> bool:
+        """
+        使用 EXISTS 检查缓存是否存在，不传输也不反序列化缓存内容
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            bool: 缓存是否存在，出错时返回False
+        """
+        try:
+            if self._write_thread is not None:
+                with self._pending_lock:
+                    if key in self._pending:
+                        return True
+            return bool(self.redis_client.exists(self._get_cache_key(key)))
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis连接问题，检查缓存失败 {key}: {str(e)}")
+            return False
+        except RedisError as e:
+            logger.error(f"Redis操作失败，检查缓存失败 {key}: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"检查Redis缓存失败 {key}: {str(e)}")
+            return False
+
+    def refresh_ttl(self, key: str) -> bool:
+        """
+        续期缓存的数据键、摘要键和索引，不传输缓存内容
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            bool: 数据键是否存在并已续期，出错时返回False
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.expire(self._get_cache_key(key), self.ttl_seconds)
+            pipe.expire(self._get_digest_key(key), self.ttl_seconds)
+            pipe.zadd(self.index_key, {key: time.time() + self.ttl_seconds}, xx=True)
+            return bool(pipe.execute()[0])
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis连接问题，续期缓存失败 {key}: {str(e)}")
+            return False
+        except RedisError as e:
+            logger.error(f"Redis操作失败，续期缓存失败 {key}: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"续期Redis缓存失败 {key}: {str(e)}")
+            return False
+
+    def pop_cache(self, key: str) -> Optional[draft.Script_file]:
+        """
+        获取并删除缓存，GET 和 DEL 放在同一个事务管道中，一次往返完成且原子执行
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            draft.Script_file or None: 被删除的对象，如果不存在或出错则返回None
+        """
+        try:
+            if self._write_thread is not None:
+                self.flush()
+            self._forget_hash(key)
+            cache_key = self._get_cache_key(key)
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.get(cache_key)
+            pipe.delete(cache_key, self._get_digest_key(key))
+            pipe.zrem(self.index_key, key)
+            pipe.publish(self.invalidation_channel, f"{self.instance_id}:{key}")
+            serialized_value = pipe.execute()[0]
+
+            if serialized_value is None:
+                logger.debug(f"缓存中不存在键: {key}")
+                return None
+
+            value = self._deserialize_value(serialized_value)
+            logger.debug(f"成功弹出Redis缓存: {key}")
+            return value
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis连接问题，弹出缓存失败 {key}: {str(e)}")
+            return None
+        except RedisError as e:
+            logger.error(f"Redis操作失败，弹出缓存失败 {key}: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"弹出Redis缓存失败 {key}: {str(e)}")
+            return None
+
     def get_cache_info(self) -> Dict[str, Any]:
         """
-        获取缓存信息
+        获取缓存信息，CACHE_INFO_TTL 秒内的重复调用直接返回上次的结果
 
         Returns:
             Dict: 缓存统计信息
         """
+        now = time.monotonic()
+        cached_at, cached_info = self._info_cache
+        if cached_info is not None and now - cached_at < CACHE_INFO_TTL:
+            return dict(cached_info)
+
         try:
-            pattern = f"{self.cache_prefix}:data:*"
-            cache_keys = self.redis_client.keys(pattern)
-            cache_count = len(cache_keys)
+            # 先清除索引中已过期的键再计数，不需要遍历键空间
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.zremrangebyscore(self.index_key, "-inf", time.time())
+            pipe.zcard(self.index_key)
+            cache_count = pipe.execute()[1]
 
             # 获取连接池信息
             pool_info = {
@@ -199,12 +606,14 @@ class RedisCache:
                 "created_connections": self.connection_pool.created_connections
             }
 
-            return {
+            info = {
                 "cache_count": cache_count,
                 "ttl_hours": self.ttl_seconds // 3600,
                 "redis_connected": True,
                 "pool_info": pool_info
             }
+            self._info_cache = (now, info)
+            return dict(info)
 
         except (ConnectionError, TimeoutError) as e:
             logger.error(f"Redis连接问题，获取缓存信息失败: {str(e)}")
@@ -217,13 +626,13 @@ class RedisCache:
             return {"error": str(e), "redis_connected": False}
 
     # 通用 Redis 操作方法
-    def set_string(self, key: str, value: str, ttl_seconds: int = None) -> bool:
+    def set_string(self, key: str, value: Union[str, bytes], ttl_seconds: int = None) -> bool:
         """
         存储字符串到 Redis
         
         Args:
             key: 键名
-            value: 字符串值
+            value: 字符串值，也可以是已编码的 bytes
             ttl_seconds: 过期时间（秒），如果为None则使用默认TTL
         
         Returns:
@@ -284,6 +693,30 @@ class RedisCache:
             logger.error(f"从Redis获取字符串失败 {key}: {str(e)}")
             return None
 
+    def get_strings(self, keys: List[str]) -> List[Optional[str]]:
+        """
+        使用 MGET 批量获取字符串，一次往返完成
+
+        Args:
+            keys: 键名列表
+
+        Returns:
+            List: 与 keys 一一对应的字符串值，不存在的键为None；出错时全部为None
+        """
+        if not keys:
+            return []
+        try:
+            values = self.redis_client.mget(keys)
+            return [value.decode('utf-8') if isinstance(value, bytes) else value for value in values]
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis连接问题，批量获取字符串失败: {str(e)}")
+        except RedisError as e:
+            logger.error(f"Redis操作失败，批量获取字符串失败: {str(e)}")
+        except Exception as e:
+            logger.error(f"从Redis批量获取字符串失败: {str(e)}")
+        return [None] * len(keys)
+
     def delete_key(self, key: str) -> bool:
         """
         删除 Redis 键
@@ -319,14 +752,19 @@ class RedisDict:
     模拟字典行为的Redis缓存类，用于完全兼容原有的 DRAFT_CACHE 使用方式
     """
 
-    def __init__(self, redis_cache_instance: RedisCache):
-        self.redis_cache = redis_cache_instance
+    def __init__(self, redis_cache_instance: Optional[RedisCache] = None):
+        # 未指定实例时使用全局实例，首次访问时才创建并连接 Redis
+        self._redis_cache = redis_cache_instance
+
+    @property
+    def redis_cache(self) -> RedisCache:
+        """底层的 RedisCache 实例"""
+        return self._redis_cache or get_redis_cache()
 
     def __contains__(self, key: str) -> bool:
         """支持 'key in cache' 语法"""
         try:
-            result = self.redis_cache.get_cache(key)
-            return result is not None
+            return self.redis_cache.exists(key)
         except Exception as e:
             logger.error(f"检查键存在性失败 {key}: {str(e)}")
             return False
@@ -340,7 +778,7 @@ class RedisDict:
 
     def __setitem__(self, key: str, value: draft.Script_file) -> None:
         """支持 cache[key] = value 语法"""
-        success = self.redis_cache.update_cache(key, value)
+        success = self.redis_cache.update_cache_async(key, value)
         if not success:
             logger.warning(f"设置缓存失败，键: {key}")
 
@@ -358,11 +796,22 @@ class RedisDict:
 
     def pop(self, key: str, default=None):
         """弹出并删除值"""
-        result = self.redis_cache.get_cache(key)
-        if result is not None:
-            self.redis_cache.delete_cache(key)
-            return result
-        return default
+        result = self.redis_cache.pop_cache(key)
+        return result if result is not None else default
+
+    def get_serialized(self, key: str) -> Optional[bytes]:
+        """获取序列化数据，不存在时返回None"""
+        return self.redis_cache.get_serialized(key)
+
+    def refresh_ttl(self, key: str) -> bool:
+        """续期键的过期时间，不传输内容"""
+        return self.redis_cache.refresh_ttl(key)
+
+    def set_serialized(self, key: str, value: draft.Script_file, serialized_value: bytes) -> None:
+        """写入已序列化好的值"""
+        success = self.redis_cache.update_cache_async(key, value, serialized_value)
+        if not success:
+            logger.warning(f"设置缓存失败，键: {key}")
 
     def __len__(self) -> int:
         """获取缓存数量"""
@@ -370,31 +819,255 @@ class RedisDict:
         return info.get("cache_count", 0)
 
 
-# 创建全局Redis缓存实例
-redis_cache = RedisCache()
+class ShardedDraftCache:
+    """
+    分片加锁的进程内草稿缓存，Redis 作为持久层（写穿透）
+
+    按 draft_id 的哈希值将草稿分配到 N 个分片，每个分片有独立的锁，
+    不同草稿之间的读写互不阻塞；未命中时回源到 Redis 并回填本地分片。
+    每个分片是容量有限的 LRU，淘汰的草稿只从本地移除，Redis 中仍保留完整数据。
+    其他进程写入或删除草稿时通过 Redis Pub/Sub 通知本进程淘汰对应的本地副本；
+    本地副本另有 local_ttl 秒的过期时间，即使通知丢失（如订阅连接断开），旧草稿也最多保留 local_ttl 秒。
+    本地分片保存的是序列化数据，每次读取都反序列化出独立的对象，调用方修改草稿后须写回才会生效，
+    与直接读取 Redis 时的语义一致。因此本地命中省去的是网络往返，反序列化仍然每次进行：
+    pickle.loads 是得到独立副本最便宜的方式（比 deepcopy 活对象更快），解压只占其中一小部分，
+    本地仍保存压缩后的数据以节省内存。
+    本地命中不访问 Redis，每个草稿每 refresh_interval 秒最多续期一次 Redis 中的过期时间，
+    常用草稿不会在 Redis 中过期。
+    """
+
+    def __init__(self, backend: RedisDict, shard_count: int = 16, max_size: int = 256, local_ttl: float = 60,
+                 refresh_interval: float = 30, subscribe_invalidations: bool = True):
+        if shard_count <= 0 or shard_count & (shard_count - 1):
+            raise ValueError("shard_count 必须是2的幂")
+        self.backend = backend
+        self._mask = shard_count - 1
+        self.shard_capacity = max(1, max_size // shard_count)
+        self.local_ttl = local_ttl
+        self.refresh_interval = refresh_interval
+        # 失效通知的订阅在首次写入本地分片前才启动，从不使用本地分片的进程不会创建订阅线程和连接
+        self._subscribe_pending = subscribe_invalidations
+        self._subscribe_lock = threading.Lock()
+        self.shards = [OrderedDict() for _ in range(shard_count)]
+        self.locks = [threading.RLock() for _ in range(shard_count)]
+
+    def _shard_index(self, key: str) -> int:
+        """计算键所在的分片下标"""
+        return hash(key) & self._mask
+
+    def _ensure_subscribed(self) -> None:
+        """首次写入本地分片前订阅其他进程的失效通知，只尝试一次"""
+        if not self._subscribe_pending:
+            return
+        with self._subscribe_lock:
+            if not self._subscribe_pending:
+                return
+            self._subscribe_pending = False
+            try:
+                self.backend.redis_cache.subscribe_invalidations(self.invalidate_local)
+            except Exception as e:
+                logger.warning(f"订阅草稿缓存失效通知失败，本地副本仅依赖过期时间: {str(e)}")
+
+    def _put_local(self, idx: int, key: str, data: bytes) -> None:
+        """写入本地分片并按 LRU 淘汰，调用方需持有分片锁"""
+        shard = self.shards[idx]
+        now = time.monotonic()
+        # (序列化数据, 本地过期时间, 下次续期 Redis 过期时间的时刻)
+        shard[key] = (data, now + self.local_ttl, now + self.refresh_interval)
+        shard.move_to_end(key)
+        while len(shard) > self.shard_capacity:
+            shard.popitem(last=False)
+
+    def _get_local(self, idx: int, key: str) -> Optional[bytes]:
+        """读取本地分片中未过期草稿的序列化数据，过期的条目顺便移除，调用方需持有分片锁"""
+        shard = self.shards[idx]
+        entry = shard.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if time.monotonic() >= expires_at:
+            del shard[key]
+            return None
+        return value
+
+    def _load(self, key: str, data: bytes) -> Optional[draft.Script_file]:
+        """反序列化出调用方独占的草稿对象"""
+        try:
+            return self.backend.redis_cache._deserialize_value(data)
+        except Exception as e:
+            logger.error(f"反序列化草稿失败 {key}: {str(e)}")
+            return None
+
+    def get(self, key: str, default=None):
+        """获取草稿，本地未命中时从 Redis 加载并回填；每次返回独立的对象"""
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            data = self._get_local(idx, key)
+            refresh = data is not None and self._refresh_due(idx, key)
+        if refresh:
+            self.backend.refresh_ttl(key)
+        if data is None:
+            # 先订阅再读取，读取之后其他进程的改写不会漏掉通知
+            self._ensure_subscribed()
+            data = self.backend.get_serialized(key)
+            if data is None:
+                return default
+            with self.locks[idx]:
+                # 其他线程可能已经回填，以先写入者为准
+                existing = self._get_local(idx, key)
+                if existing is not None:
+                    data = existing
+                else:
+                    self._put_local(idx, key, data)
+
+        value = self._load(key, data)
+        return default if value is None else value
+
+    def _refresh_due(self, idx: int, key: str) -> bool:
+        """本地命中时判断是否该续期 Redis 中的过期时间，到期则顺延下次续期时刻，调用方需持有分片锁"""
+        data, expires_at, refresh_at = self.shards[idx][key]
+        now = time.monotonic()
+        if now < refresh_at:
+            return False
+        self.shards[idx][key] = (data, expires_at, now + self.refresh_interval)
+        return True
+
+    def invalidate_local(self, key: str) -> None:
+        """只淘汰本地副本，下次读取时从 Redis 重新加载"""
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            self.shards[idx].pop(key, None)
+
+    def touch(self, key: str) -> None:
+        """将草稿标记为最近使用"""
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            if key in self.shards[idx]:
+                self.shards[idx].move_to_end(key)
+
+    def set(self, key: str, value: draft.Script_file) -> None:
+        """序列化一次，同时写入本地分片和 Redis；之后对 value 的修改不会影响缓存内容"""
+        data = self.backend.redis_cache._serialize_value(value)
+        self._ensure_subscribed()
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            self._put_local(idx, key, data)
+        self.backend.set_serialized(key, value, data)
+
+    def contains(self, key: str) -> bool:
+        """检查草稿是否存在，本地未命中时只用 EXISTS 询问 Redis，不加载草稿内容"""
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            if self._get_local(idx, key) is not None:
+                return True
+        return key in self.backend
+
+    def delete(self, key: str) -> None:
+        """从本地分片和 Redis 中删除草稿"""
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            self.shards[idx].pop(key, None)
+        del self.backend[key]
+
+    def pop(self, key: str, default=None):
+        """弹出并删除草稿"""
+        idx = self._shard_index(key)
+        with self.locks[idx]:
+            data = self._get_local(idx, key)
+            self.shards[idx].pop(key, None)
+        if data is not None:
+            # 本地命中时无需再从 Redis 取回数据，只需删除
+            del self.backend[key]
+            value = self._load(key, data)
+            return default if value is None else value
+        return self.backend.pop(key, default)
+
+    def clear_all(self) -> None:
+        """清空本地分片（按下标升序获取全部锁，避免死锁），不影响 Redis 中的数据"""
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            for shard in self.shards:
+                shard.clear()
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
+
+    def __contains__(self, key: str) -> bool:
+        """支持 'key in cache' 语法"""
+        return self.contains(key)
+
+    def __getitem__(self, key: str) -> draft.Script_file:
+        """支持 cache[key] 语法"""
+        value = self.get(key)
+        if value is None:
+            raise KeyError(f"缓存中不存在键: {key}")
+        return value
+
+    def __setitem__(self, key: str, value: draft.Script_file) -> None:
+        """支持 cache[key] = value 语法"""
+        self.set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """支持 del cache[key] 语法"""
+        self.delete(key)
+
+    def __len__(self) -> int:
+        """获取缓存数量（以 Redis 为准）"""
+        return len(self.backend)
+
+
+# 全局Redis缓存实例，草稿缓存、导出队列和导出进度缓存共用其连接池；
+# 首次使用时才创建，导入本模块时不连接 Redis
+_redis_cache: Optional[RedisCache] = None
+_redis_cache_lock = threading.Lock()
+
+
+def get_redis_cache() -> RedisCache:
+    """获取全局Redis缓存实例，首次调用时创建并连接 Redis"""
+    global _redis_cache
+    if _redis_cache is None:
+        with _redis_cache_lock:
+            if _redis_cache is None:
+                cache = RedisCache(max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 20)))
+                if os.getenv('DRAFT_CACHE_WRITE_BEHIND', '').lower() in ('1', 'true'):
+                    cache.enable_write_behind()
+                _redis_cache = cache
+    return _redis_cache
+
+
+def __getattr__(name: str):
+    """兼容 from tools.redis_cache import redis_cache，访问时才创建全局实例"""
+    if name == "redis_cache":
+        return get_redis_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # 创建字典式接口，完全兼容原有的 DRAFT_CACHE 使用方式
-DRAFT_CACHE = RedisDict(redis_cache)
+DRAFT_CACHE = ShardedDraftCache(
+    RedisDict(),
+    max_size=int(os.getenv('DRAFT_CACHE_LOCAL_SIZE', 256)),
+    local_ttl=float(os.getenv('DRAFT_CACHE_LOCAL_TTL', 60)),
+    subscribe_invalidations=os.getenv('DRAFT_CACHE_INVALIDATION', '1').lower() not in ('0', 'false')
+)
 
 
 # 为了保持向后兼容，提供与原来 draft_cache.py 相同的接口
 def update_cache(key: str, value: draft.Script_file) -> None:
     """向后兼容的更新缓存函数"""
-    success = redis_cache.update_cache(key, value)
-    if not success:
-        logger.warning(f"更新Redis缓存失败，键: {key}")
+    DRAFT_CACHE.set(key, value)
 
 
 def get_cache(key: str) -> Optional[draft.Script_file]:
     """获取缓存的便捷函数"""
-    return redis_cache.get_cache(key)
+    return get_redis_cache().get_cache(key)
 
 
 def delete_cache(key: str) -> bool:
     """删除缓存的便捷函数"""
-    return redis_cache.delete_cache(key)
+    return get_redis_cache().delete_cache(key)
 
 
 def get_cache_info() -> Dict[str, Any]:
     """获取缓存信息的便捷函数"""
-    return redis_cache.get_cache_info() 
\ No newline at end of file
+    return get_redis_cache().get_cache_info() 
\ No newline at end of file
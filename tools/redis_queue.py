@@ -1,12 +1,15 @@
-import json
 import time
 import logging
+import itertools
 import threading
 import os
 import platform
-from typing import Dict, Any, Optional
-from tools.redis_cache import redis_cache, DRAFT_CACHE
-from export_progress_cache import export_progress_cache
+from typing import Dict, Any, Optional, Tuple
+
+import orjson
+
+from tools.redis_cache import get_redis_cache, DRAFT_CACHE
+from export_progress_cache import get_export_progress_cache
 # 导入save_draft_impl
 from save_draft_impl import save_draft_impl
 # 平台检测和条件性导入
@@ -19,28 +22,141 @@ if IS_WINDOWS:
         print(f"Warning: Could not import Jianying_controller on Windows: {e}")
         IS_WINDOWS = False
 
+# 剪映控制器仅在 Windows 上导入成功时可用
+_JIANYING_CONTROLLER = Jianying_controller if IS_WINDOWS else None
+# 请求参数字符串到导出分辨率/帧率枚举的查找表
+_RESOLUTION_LUT = {member.value: member for member in Export_resolution} if IS_WINDOWS else {}
+_FRAMERATE_LUT = {member.value: member for member in Export_framerate} if IS_WINDOWS else {}
+
 logger = logging.getLogger(__name__)
 
+# 队列为空时的轮询退避：从10毫秒开始逐次翻倍，最长500毫秒
+EMPTY_POLL_BASE_DELAY = 0.01
+EMPTY_POLL_MAX_DELAY = 0.5
+
+# 每次写入都会变化的进度字段，比较进度是否变化时忽略
+_VOLATILE_PROGRESS_FIELDS = ("start_time", "elapsed")
+
+# 逐个任务的提交/获取/完成日志为 DEBUG 级别，每处理这么多个任务输出一条 INFO 汇总
+TASK_LOG_SUMMARY_INTERVAL = 100
+
+# 任务结果保存时间（秒）
+RESULT_TTL = 86400
+
+# 处理中的任务每隔这么多秒刷新一次心跳；心跳超过 CLAIM_STALE_AFTER 秒未刷新的处理中记录视为处理进程已退出
+CLAIM_HEARTBEAT_INTERVAL = 10
+CLAIM_STALE_AFTER = 60
+
+# submit_export_task 的提交结果
+SUBMIT_QUEUED = "queued"
+SUBMIT_ALREADY_QUEUED = "already_queued"
+SUBMIT_ALREADY_PROCESSING = "already_processing"
+
+# 原子地弹出队尾任务并写入处理中哈希表，避免弹出后、登记前进程崩溃导致任务丢失；
+# 同时从排队集合中移除并写入首次心跳。任务JSON原样保存在处理中记录的 task 字段中，
+# 不经 cjson 重新编码（否则浮点数被截断为14位有效数字、空列表变为 {}），状态和开始时间放在外层字段
+# KEYS[1]: 任务队列，KEYS[2]: 处理中哈希表，KEYS[3]: 排队中草稿集合，KEYS[4]: 心跳哈希表
+# ARGV[1]: 开始处理的时间戳
+_POP_TASK_SCRIPT = """
+local task_json = redis.call('RPOP', KEYS[1])
+if not task_json then
+    return false
+end
+local draft_id = cjson.decode(task_json)['draft_id']
+redis.call('HSET', KEYS[2], draft_id,
+    '{"status":"processing","processing_started_at":' .. ARGV[1] .. ',"task":' .. task_json .. '}')
+redis.call('SREM', KEYS[3], draft_id)
+redis.call('HSET', KEYS[4], draft_id, ARGV[1])
+return task_json
+"""
+
+# 原子地检查重复提交并入队：草稿已在排队时返回 already_queued，
+# 正在处理且心跳未过期时返回 already_processing；处理中记录的心跳已过期时清理该记录，
+# 然后推入任务队列、登记排队集合、写入进度并发布进度更新通知，返回 queued
+# KEYS[1]: 任务队列，KEYS[2]: 处理中哈希表，KEYS[3]: 进度键，KEYS[4]: 排队中草稿集合，KEYS[5]: 心跳哈希表
+# ARGV[1]: draft_id，ARGV[2]: 任务JSON，ARGV[3]: 进度JSON，ARGV[4]: 进度过期时间（秒），
+# ARGV[5]: 进度更新频道，ARGV[6]: 当前时间戳，ARGV[7]: 心跳过期时间（秒）
+_SUBMIT_TASK_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[4], ARGV[1]) == 1 then
+    return 'already_queued'
+end
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    local heartbeat = tonumber(redis.call('HGET', KEYS[5], ARGV[1])) or 0
+    if tonumber(ARGV[6]) - heartbeat < tonumber(ARGV[7]) then
+        return 'already_processing'
+    end
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('HDEL', KEYS[5], ARGV[1])
+end
+redis.call('LPUSH', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[4], ARGV[1])
+redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+redis.call('PUBLISH', ARGV[5], ARGV[1])
+return 'queued'
+"""
+
+# 仅当心跳仍是本线程最后写入的值时才删除，避免误删同一草稿被重新领取后其他处理进程写入的心跳
+# KEYS[1]: 心跳哈希表，ARGV[1]: draft_id，ARGV[2]: 本线程最后写入的心跳时间戳
+_CLEAR_HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
 class ExportQueueManager:
     """导出任务队列管理器"""
     
     def __init__(self):
         self.queue_key = "export_task_queue"
         self.processing_key = "export_processing"
+        # 排队中草稿的集合，用于识别重复提交
+        self.queued_key = "export_queued"
+        # 处理中任务的心跳时间戳，处理进程退出后心跳停止刷新，据此判断处理中记录是否失效
+        self.heartbeat_key = "export_heartbeat"
         self.result_key = "export_result"
-        self.local_task_lock = threading.Lock()
-        self.is_processing_local = False
+        # Redis 7.4+ 支持哈希字段级过期，任务结果集中保存在一个哈希表中，否则每个结果单独一个键
+        self.results_hash_key = "export_results"
+        self._hash_field_ttl: Optional[bool] = None
         self.current_local_task = None
+        # 本地没有导出任务时处于置位状态，处理循环据此等待而不是定时轮询；
+        # 同时作为本地任务运行标志，读取时无需加锁
+        self._local_done = threading.Event()
+        self._local_done.set()
+        # 当前本地任务的心跳线程停止信号，每个任务单独一个，避免旧线程错过停止信号后一直刷新心跳
+        self._heartbeat_stop: Optional[threading.Event] = None
+        # 本进程正在处理的任务最近一次写入的进度 (draft_id, 指纹)，内容未变时跳过重复写入；
+        # 只记录处理线程当前任务，任务完成或重新入队时清除
+        self._last_progress: Optional[Tuple[str, int]] = None
+        # 本进程提交/完成的任务计数，用于定期输出汇总日志
+        self._submitted_count = itertools.count(1)
+        self._completed_count = itertools.count(1)
+        self._failed_count = 0
+        # 已注册的 Lua 脚本，按脚本源码索引，首次执行时注册
+        self._scripts: Dict[str, Any] = {}
+    
+    @property
+    def redis_client(self):
+        """复用全局缓存实例的客户端及其连接池，首次访问时才连接 Redis"""
+        return get_redis_cache().redis_client
+    
+    def _run_script(self, script: str, keys: list, args: list):
+        """执行 Lua 脚本；redis-py 首次调用时自动 SCRIPT LOAD，之后通过 EVALSHA 执行"""
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.redis_client.register_script(script)
+        return registered(keys=keys, args=args)
         
-    def submit_export_task(self, task_data: Dict[str, Any]) -> str:
+    def submit_export_task(self, task_data: Dict[str, Any]) -> Tuple[str, str]:
         """
-        提交导出任务到Redis队列
+        提交导出任务到Redis队列，同一草稿已在排队或正在处理时不重复入队
         
         Args:
             task_data: 任务数据，包含draft_id, draft_name, resolution, framerate等
             
         Returns:
-            str: 任务ID
+            Tuple[str, str]: (任务ID, 提交结果)，提交结果为 SUBMIT_QUEUED、
+                SUBMIT_ALREADY_QUEUED 或 SUBMIT_ALREADY_PROCESSING
         """
         try:
             draft_id = task_data.get('draft_id')
@@ -51,31 +167,51 @@ class ExportQueueManager:
             if draft_id not in DRAFT_CACHE:
                 raise Exception(f"Draft {draft_id} does not exist in cache. Please create or save the draft first.")
             
-            logger.info(f"草稿 {draft_id} 存在于缓存中，准备提交导出任务")
+            logger.debug(f"草稿 {draft_id} 存在于缓存中，准备提交导出任务")
                 
-            task_data['created_at'] = time.time()
+            # 同一事件内的时间戳保持一致
+            now = time.time()
+            task_data['created_at'] = now
             task_data['status'] = 'queued'
             
-            # 将任务推入Redis队列
-            task_json = json.dumps(task_data)
-            success = redis_cache.redis_client.lpush(self.queue_key, task_json)
-            
-            if success:
-                logger.info(f"成功提交导出任务到队列: {draft_id}")
-                
-                # 初始化任务状态
-                export_progress_cache.set_progress(draft_id, {
-                    "status": "queued",
-                    "percent": 0.0,
-                    "message": "任务已加入队列等待处理",
-                    "draft_id": draft_id,
-                    "start_time": time.time(),
-                    "elapsed": 0
-                })
-                
-                return draft_id
-            else:
-                raise Exception("Failed to push task to Redis queue")
+            # 将任务推入Redis队列并初始化任务状态，同一草稿已在排队或处理中时不重复入队
+            progress = {
+                "status": "queued",
+                "percent": 0.0,
+                "message": "任务已加入队列等待处理",
+                "draft_id": draft_id,
+                "start_time": now,
+                "elapsed": 0
+            }
+            progress_cache = get_export_progress_cache()
+            status = self._run_script(
+                _SUBMIT_TASK_SCRIPT,
+                keys=[
+                    self.queue_key, self.processing_key, progress_cache._get_progress_key(draft_id),
+                    self.queued_key, self.heartbeat_key
+                ],
+                args=[
+                    draft_id,
+                    orjson.dumps(task_data),
+                    orjson.dumps(progress),
+                    progress_cache.cache_duration,
+                    progress_cache.UPDATE_CHANNEL,
+                    now,
+                    CLAIM_STALE_AFTER
+                ]
+            )
+            if isinstance(status, bytes):
+                status = status.decode('utf-8')
+            
+            if status != SUBMIT_QUEUED:
+                logger.info(f"导出任务已在队列中或正在处理，忽略重复提交: {draft_id} ({status})")
+                return draft_id, status
+            
+            logger.debug(f"成功提交导出任务到队列: {draft_id}")
+            submitted = next(self._submitted_count)
+            if submitted % TASK_LOG_SUMMARY_INTERVAL == 0:
+                logger.info(f"本进程已提交 {submitted} 个导出任务")
+            return draft_id, status
                 
         except Exception as e:
             logger.error(f"提交导出任务失败: {str(e)}")
@@ -89,25 +225,21 @@ class ExportQueueManager:
             Dict: 任务数据，如果没有任务则返回None
         """
         try:
-            # 使用阻塞弹出，超时2秒
-            result = redis_cache.redis_client.brpop([self.queue_key], timeout=2)
+            # 非阻塞弹出，队列为空时由处理循环退避等待，不在 Redis 端挂起阻塞连接；
+            # 弹出、标记为处理中并移动到处理中列表在同一个 Lua 脚本中完成
+            now = time.time()
+            task_json = self._run_script(
+                _POP_TASK_SCRIPT,
+                keys=[self.queue_key, self.processing_key, self.queued_key, self.heartbeat_key],
+                args=[now]
+            )
             
-            if result:
-                queue_name, task_json = result
-                task_data = json.loads(task_json.decode('utf-8'))
-                
-                # 标记任务为处理中
+            if task_json:
+                task_data = orjson.loads(task_json)
                 task_data['status'] = 'processing'
-                task_data['processing_started_at'] = time.time()
-                
-                # 将任务移动到处理中列表
-                redis_cache.redis_client.hset(
-                    self.processing_key, 
-                    task_data['draft_id'], 
-                    json.dumps(task_data)
-                )
+                task_data['processing_started_at'] = now
                 
-                logger.info(f"获取到导出任务: {task_data['draft_id']}")
+                logger.debug(f"获取到导出任务: {task_data['draft_id']}")
                 return task_data
             
             return None
@@ -127,19 +259,17 @@ class ExportQueueManager:
         try:
             draft_id = task_data.get('draft_id')
             
-            # 从处理中列表移除
-            redis_cache.redis_client.hdel(self.processing_key, draft_id)
-            
             # 重置任务状态
             task_data['status'] = 'queued'
-            task_data['requeued_at'] = time.time()
+            now = time.time()
+            task_data['requeued_at'] = now
             task_data['requeue_reason'] = reason
             
             # 增加重试次数
             retry_count = task_data.get('retry_count', 0) + 1
             task_data['retry_count'] = retry_count
             
-            # 如果重试次数过多，标记为失败
+            # 如果重试次数过多，标记为失败（complete_task 会从处理中列表移除）
             if retry_count > 3:
                 logger.error(f"任务 {draft_id} 重试次数过多 ({retry_count})，标记为失败")
                 self.complete_task(draft_id, False, {
@@ -148,23 +278,28 @@ class ExportQueueManager:
                 })
                 return
             
-            # 重新推入队列
-            task_json = json.dumps(task_data)
-            success = redis_cache.redis_client.lpush(self.queue_key, task_json)
+            # 从处理中列表移除、重新推入队列并更新进度状态，一次往返完成
+            task_json = orjson.dumps(task_data)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hdel(self.processing_key, draft_id)
+            pipe.lpush(self.queue_key, task_json)
+            pipe.hdel(self.heartbeat_key, draft_id)
+            pipe.sadd(self.queued_key, draft_id)
+            progress = {
+                "status": "queued",
+                "percent": 0.0,
+                "message": f"任务已重新加入队列 (重试 {retry_count}/3): {reason}",
+                "draft_id": draft_id,
+                "start_time": now,
+                "elapsed": 0,
+                "retry_count": retry_count
+            }
+            get_export_progress_cache().queue_progress(pipe, draft_id, progress)
+            success = pipe.execute()[1]
+            self._last_progress = None
             
             if success:
                 logger.info(f"任务 {draft_id} 已重新加入队列 (重试次数: {retry_count}): {reason}")
-                
-                # 更新进度状态
-                export_progress_cache.set_progress(draft_id, {
-                    "status": "queued",
-                    "percent": 0.0,
-                    "message": f"任务已重新加入队列 (重试 {retry_count}/3): {reason}",
-                    "draft_id": draft_id,
-                    "start_time": time.time(),
-                    "elapsed": 0,
-                    "retry_count": retry_count
-                })
             else:
                 logger.error(f"重新入队失败: {draft_id}")
                 
@@ -181,9 +316,6 @@ class ExportQueueManager:
             result_data: 结果数据
         """
         try:
-            # 从处理中列表移除
-            redis_cache.redis_client.hdel(self.processing_key, draft_id)
-            
             # 记录结果
             result = {
                 "draft_id": draft_id,
@@ -192,39 +324,149 @@ class ExportQueueManager:
                 "result_data": result_data or {}
             }
             
-            # 结果保存24小时
-            redis_cache.redis_client.setex(
-                f"{self.result_key}:{draft_id}", 
-                86400,  # 24小时
-                json.dumps(result)
-            )
+            # 从处理中列表移除，结果保存24小时，一次往返完成
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hdel(self.processing_key, draft_id)
+            pipe.hdel(self.heartbeat_key, draft_id)
+            if self._supports_hash_field_ttl():
+                pipe.hset(self.results_hash_key, draft_id, orjson.dumps(result))
+                pipe.hexpire(self.results_hash_key, RESULT_TTL, draft_id)
+            else:
+                pipe.setex(f"{self.result_key}:{draft_id}", RESULT_TTL, orjson.dumps(result))
+            pipe.execute()
+            self._last_progress = None
             
-            logger.info(f"任务完成: {draft_id}, 成功: {success}")
+            if success:
+                logger.debug(f"任务完成: {draft_id}, 成功: {success}")
+            else:
+                self._failed_count += 1
+                logger.info(f"任务完成: {draft_id}, 成功: {success}")
+            completed = next(self._completed_count)
+            if completed % TASK_LOG_SUMMARY_INTERVAL == 0:
+                logger.info(f"本进程已完成 {completed} 个导出任务，其中失败 {self._failed_count} 个")
             
         except Exception as e:
             logger.error(f"标记任务完成失败: {str(e)}")
     
+    def get_task_result(self, draft_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        获取任务结果及处理中记录，一次往返完成
+        
+        Args:
+            draft_id: 草稿ID
+            
+        Returns:
+            Tuple: (任务结果, 处理中记录)，不存在的项为None；处理中记录包含
+                status、processing_started_at 及原始任务数据 task
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hget(self.results_hash_key, draft_id)
+        pipe.get(f"{self.result_key}:{draft_id}")
+        pipe.hget(self.processing_key, draft_id)
+        hash_result_json, result_json, processing_json = pipe.execute()
+        
+        # 升级 Redis 前写入的结果仍保存在单独的键中，两处都需要查询
+        result_json = hash_result_json or result_json
+        return (
+            orjson.loads(result_json) if result_json else None,
+            orjson.loads(processing_json) if processing_json else None
+        )
+    
+    def _supports_hash_field_ttl(self) -> bool:
+        """检测 Redis 服务端（7.4+）及客户端是否支持哈希字段过期，结果只检测一次"""
+        if self._hash_field_ttl is None:
+            try:
+                version = self.redis_client.info("server").get("redis_version", "0")
+                major_minor = tuple(int(part) for part in version.split(".")[:2])
+                self._hash_field_ttl = major_minor >= (7, 4) and hasattr(self.redis_client, "hexpire")
+            except Exception as e:
+                logger.warning(f"检测 Redis 版本失败，任务结果使用单独的键保存: {e}")
+                self._hash_field_ttl = False
+        return self._hash_field_ttl
+    
+    @staticmethod
+    def _progress_fingerprint(progress: Dict[str, Any]) -> int:
+        """计算进度内容的指纹，忽略每次都会变化的时间字段"""
+        return hash(tuple(sorted(
+            (key, value) for key, value in progress.items() if key not in _VOLATILE_PROGRESS_FIELDS
+        )))
+    
+    def set_progress_if_changed(self, draft_id: str, progress: Dict[str, Any]) -> bool:
+        """
+        仅当进度内容与本进程为当前任务上次写入的不同时才写入Redis（仅由任务处理线程调用）
+        
+        Returns:
+            bool: 是否实际写入
+        """
+        last_progress = (draft_id, self._progress_fingerprint(progress))
+        if self._last_progress == last_progress:
+            logger.debug(f"导出进度未变化，跳过写入: {draft_id}")
+            return False
+        get_export_progress_cache().set_progress(draft_id, progress)
+        self._last_progress = last_progress
+        return True
+    
     def is_local_task_running(self) -> bool:
         """检查本地是否有导出任务正在进行"""
-        with self.local_task_lock:
-            return self.is_processing_local
+        return not self._local_done.is_set()
     
     def set_local_task_running(self, task_id: str = None, running: bool = True):
-        """设置本地任务运行状态"""
-        with self.local_task_lock:
-            self.is_processing_local = running
-            self.current_local_task = task_id if running else None
-            
+        """设置本地任务运行状态（仅由任务处理线程调用）"""
+        if running:
+            self.current_local_task = task_id
+            self._last_progress = None
+            self._local_done.clear()
+            self._heartbeat_stop = threading.Event()
+            threading.Thread(
+                target=self._heartbeat_loop, args=(task_id, self._heartbeat_stop), daemon=True
+            ).start()
+        else:
+            if self._heartbeat_stop is not None:
+                self._heartbeat_stop.set()
+                self._heartbeat_stop = None
+            self._local_done.set()
+            self.current_local_task = None
+        
         if running:
             logger.info(f"开始本地导出任务: {task_id}")
         else:
             logger.info(f"本地导出任务完成: {task_id}")
     
+    def _heartbeat_loop(self, task_id: str, stop: threading.Event) -> None:
+        """本地任务进行期间定期刷新心跳，stop 置位后退出并清除本线程写入的心跳"""
+        last_beat = None
+        while not stop.wait(CLAIM_HEARTBEAT_INTERVAL):
+            try:
+                # 写入超时时服务端仍可能已写入，先记下本次的值以便退出时补删
+                last_beat = time.time()
+                self.redis_client.hset(self.heartbeat_key, task_id, last_beat)
+            except Exception as e:
+                logger.warning(f"刷新导出任务心跳失败: {task_id} - {str(e)}")
+        
+        # 任务结束时 hset 可能仍阻塞在慢速 Redis 上，晚于 complete_task 的 hdel 写入，这里补删一次
+        if last_beat is not None:
+            try:
+                self._run_script(_CLEAR_HEARTBEAT_SCRIPT, keys=[self.heartbeat_key], args=[task_id, last_beat])
+            except Exception as e:
+                logger.warning(f"清除导出任务心跳失败: {task_id} - {str(e)}")
+    
+    def wait_local_task_done(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待本地导出任务结束
+        
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+            
+        Returns:
+            bool: 本地是否已没有任务在进行
+        """
+        return self._local_done.wait(timeout)
+    
     def get_queue_info(self) -> Dict[str, Any]:
         """获取队列信息"""
         try:
-            queue_length = redis_cache.redis_client.llen(self.queue_key)
-            processing_count = redis_cache.redis_client.hlen(self.processing_key)
+            queue_length = self.redis_client.llen(self.queue_key)
+            processing_count = self.redis_client.hlen(self.processing_key)
             
             return {
                 "queue_length": queue_length,
@@ -247,23 +489,6 @@ class ExportTaskProcessor:
         self.queue_manager = queue_manager
         self.is_running = False
         self.processor_thread = None
-        
-        # 平台检测
-        self.is_windows = platform.system() == 'Windows'
-        
-        # 动态导入剪映控制器（仅Windows）
-        self.jianying_controller_class = None
-        self.export_resolution_class = None
-        self.export_framerate_class = None
-        
-        if self.is_windows:
-            try:
-                self.jianying_controller_class = Jianying_controller
-                self.export_resolution_class = Export_resolution
-                self.export_framerate_class = Export_framerate
-            except ImportError as e:
-                logger.warning(f"Windows平台但无法导入剪映控制器: {e}")
-                self.is_windows = False
     
     def start_processor(self):
         """启动任务处理器"""
@@ -272,7 +497,7 @@ class ExportTaskProcessor:
             return
         
         # 检查系统是否为Windows，如果不是则不启动处理器
-        if not self.is_windows:
+        if not IS_WINDOWS:
             logger.info("非Windows系统，跳过启动导出任务处理器")
             return
             
@@ -290,17 +515,22 @@ class ExportTaskProcessor:
     
     def _process_loop(self):
         """任务处理循环"""
+        empty_polls = 0
         while self.is_running:
             try:
-                # 检查本地是否有任务在进行
-                if self.queue_manager.is_local_task_running():
-                    time.sleep(2)  # 等待2秒再检查
+                # 本地有任务在进行时等待其结束，任务一结束立即被唤醒；
+                # 单次等待不超过500毫秒，以便及时响应停止请求
+                if not self.queue_manager.wait_local_task_done(EMPTY_POLL_MAX_DELAY):
                     continue
                 
                 # 获取下一个任务
                 task_data = self.queue_manager.get_next_task()
                 if not task_data:
-                    continue  # 没有任务，继续循环
+                    # 没有任务，指数退避后继续循环；每次等待不超过500毫秒，停止处理器时能及时退出
+                    time.sleep(min(EMPTY_POLL_BASE_DELAY * 2 ** empty_polls, EMPTY_POLL_MAX_DELAY))
+                    empty_polls = min(empty_polls + 1, 16)
+                    continue
+                empty_polls = 0
                 
                 # 处理任务
                 self._process_task(task_data)
@@ -317,18 +547,20 @@ class ExportTaskProcessor:
             task_data: 任务数据
         """
         draft_id = task_data.get('draft_id')
+        # 本次处理的所有进度更新共用开始时间，读取进度时据此计算已耗时
+        start_time = time.time()
         
         try:
             # 标记本地任务开始
             self.queue_manager.set_local_task_running(draft_id, True)
             
             # 更新进度状态
-            export_progress_cache.set_progress(draft_id, {
+            self.queue_manager.set_progress_if_changed(draft_id, {
                 "status": "processing",
                 "percent": 0.0,
                 "message": "开始处理导出任务",
                 "draft_id": draft_id,
-                "start_time": time.time(),
+                "start_time": start_time,
                 "elapsed": 0
             })
             
@@ -341,12 +573,12 @@ class ExportTaskProcessor:
                 raise Exception(f"Save draft失败: {save_result.get('error', 'Unknown error')}")
             
             # 更新进度
-            export_progress_cache.set_progress(draft_id, {
+            self.queue_manager.set_progress_if_changed(draft_id, {
                 "status": "processing",
                 "percent": 50.0,
                 "message": "草稿保存完成，开始导出视频",
                 "draft_id": draft_id,
-                "start_time": time.time(),
+                "start_time": start_time,
                 "elapsed": 0
             })
             
@@ -367,12 +599,12 @@ class ExportTaskProcessor:
             logger.error(f"处理导出任务失败 {draft_id}: {str(e)}")
             
             # 更新失败状态
-            export_progress_cache.set_progress(draft_id, {
+            self.queue_manager.set_progress_if_changed(draft_id, {
                 "status": "failed",
                 "percent": 0.0,
                 "message": f"导出任务失败: {str(e)}",
                 "draft_id": draft_id,
-                "start_time": time.time(),
+                "start_time": start_time,
                 "elapsed": 0,
                 "error": str(e)
             })
@@ -386,7 +618,7 @@ class ExportTaskProcessor:
     def _execute_export_draft(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """执行export_draft逻辑"""
         try:
-            if not self.jianying_controller_class:
+            if _JIANYING_CONTROLLER is None:
                 return {"success": False, "error": "剪映控制器未能正确导入"}
             
             # 获取参数
@@ -398,24 +630,22 @@ class ExportTaskProcessor:
             if not draft_id:
                 return {"success": False, "error": "缺少必需参数 draft_id"}
             
-            # 获取剪映控制器实例
-            controller = self._get_jianying_controller()
-            
-            # 转换分辨率和帧率参数
+            # 转换分辨率和帧率参数，参数无效时无需初始化剪映控制器
             resolution_enum = None
             if resolution:
-                try:
-                    resolution_enum = self.export_resolution_class(resolution)
-                except ValueError:
+                resolution_enum = _RESOLUTION_LUT.get(resolution)
+                if resolution_enum is None:
                     return {"success": False, "error": f"不支持的分辨率: {resolution}"}
             
             framerate_enum = None
             if framerate:
-                try:
-                    framerate_enum = self.export_framerate_class(framerate)
-                except ValueError:
+                framerate_enum = _FRAMERATE_LUT.get(framerate)
+                if framerate_enum is None:
                     return {"success": False, "error": f"不支持的帧率: {framerate}"}
             
+            # 获取剪映控制器实例
+            controller = self._get_jianying_controller()
+            
             # 开始导出
             controller.export_draft(
                 draft_name=draft_id,
@@ -445,7 +675,7 @@ class ExportTaskProcessor:
             ui_initializer = uia.UIAutomationInitializerInThread()
             
             # 创建新的控制器实例
-            controller = self.jianying_controller_class()
+            controller = _JIANYING_CONTROLLER()
             return controller
             
         except Exception as e:
@@ -1,11 +1,9 @@
 import os
-import time
-import tempfile
 import threading
 import logging
-import random
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Optional, Callable
+import itertools
+from concurrent.futures import ThreadPoolExecutor, Future, wait, as_completed
+from typing import Optional, Callable, Dict, List, Tuple
 
 # 处理相对导入问题
 try:
@@ -17,20 +15,57 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 上传文件名序号，结合进程号保证同一时刻并发上传不会重名
+_file_name_counter = itertools.count()
+
+
+class _SlotHold:
+    """
+    一个上传任务占用的待完成名额，可被多个仍在运行的上传共同持有：
+    对冲上传中落败但仍在上传的请求同样占用数据缓冲区，全部结束后才归还名额
+    """
+    
+    def __init__(self, semaphore: threading.BoundedSemaphore):
+        self._semaphore = semaphore
+        self._holders = 1
+        self._lock = threading.Lock()
+    
+    def retain(self) -> None:
+        """增加一个持有者"""
+        with self._lock:
+            self._holders += 1
+    
+    def release(self) -> None:
+        """减少一个持有者，最后一个持有者释放时归还名额"""
+        with self._lock:
+            self._holders -= 1
+            done = self._holders == 0
+        if done:
+            self._semaphore.release()
+
+
 class UploadManager:
     """多线程上传管理器，支持七牛云和阿里云"""
     
-    def __init__(self, max_workers: int = 3):
+    def __init__(self, max_workers: int = 3, hedge_delay: Optional[float] = None):
         """
         初始化上传管理器
         
         Args:
             max_workers: 最大并发上传线程数
+            hedge_delay: 对冲上传延迟（秒）。设置后七牛云上传超过该时间仍未完成时，
+                同时向阿里云上传，取先成功的结果；默认不启用，七牛云失败后才尝试阿里云
         """
         self.max_workers = max_workers
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # 限制已提交但未完成的上传数，队列满时提交方阻塞，避免突发流量下大量待上传数据堆积在内存中
+        self._pending_slots = threading.BoundedSemaphore(max_workers * 2)
         self.qiniu_uploader = QiniuUploader()
         self.aliyun_uploader = AliyunUploader()
+        
+        self.hedge_delay = hedge_delay
+        # 对冲上传使用独立线程池，避免上传线程等待同一线程池中的子任务而死锁
+        self._hedge_executor = ThreadPoolExecutor(max_workers=max_workers * 2) if hedge_delay is not None else None
     
     def upload_async(
         self, 
@@ -51,7 +86,7 @@ class UploadManager:
         Returns:
             Future对象，可以用来获取上传结果
         """
-        return self.executor.submit(
+        return self._submit(
             self._upload_with_fallback, 
             data, 
             file_extension, 
@@ -72,12 +107,41 @@ class UploadManager:
         """
         return self._upload_with_fallback(data, file_extension)
     
+    def upload_many(self, items: List[Tuple[bytes, str]]) -> List[str]:
+        """
+        并发上传多个文件，并发数受线程池大小限制
+        
+        Args:
+            items: (文件二进制数据, 文件扩展名) 列表
+            
+        Returns:
+            与items顺序对应的文件URL列表，失败的项为空字符串
+        """
+        futures = [
+            self._submit(self._upload_with_fallback, data, file_extension)
+            for data, file_extension in items
+        ]
+        return [future.result() for future in futures]
+    
+    def _submit(self, fn, *args) -> Future:
+        """提交任务到线程池，待完成任务数达到上限时阻塞等待；任务及其遗留的对冲上传都结束后才归还名额"""
+        self._pending_slots.acquire()
+        slot = _SlotHold(self._pending_slots)
+        try:
+            future = self.executor.submit(fn, *args, slot=slot)
+        except BaseException:
+            slot.release()
+            raise
+        future.add_done_callback(lambda _: slot.release())
+        return future
+    
     def _upload_with_fallback(
         self, 
         data: bytes, 
         file_extension: str,
         on_success: Optional[Callable[[str], None]] = None,
-        on_failure: Optional[Callable[[str], None]] = None
+        on_failure: Optional[Callable[[str], None]] = None,
+        slot: Optional[_SlotHold] = None
     ) -> str:
         """
         带回退机制的上传方法：优先七牛云，失败时使用阿里云
@@ -86,21 +150,15 @@ class UploadManager:
         logger.info(f"开始上传文件，大小: {file_size_mb:.2f} MB")
         print(f"📤 开始上传文件 ({file_size_mb:.2f} MB)")
         
-        # 创建临时文件
-        temp_file_path = None
         try:
-            # 生成临时文件路径
-            temp_file_path = os.path.join(
-                tempfile.gettempdir(), 
-                f"{int(time.time())}_{random.randint(1000, 9999)}.{file_extension}"
-            )
+            # 直接上传内存中的数据，不再落盘为临时文件
+            file_name = f"{os.getpid()}_{next(_file_name_counter)}.{file_extension}"
             
-            # 写入临时文件
-            with open(temp_file_path, 'wb') as f:
-                f.write(data)
+            if self._hedge_executor is not None:
+                return self._upload_hedged(data, file_name, on_success, on_failure, slot)
             
             # 优先尝试七牛云上传
-            success, result, info = self.qiniu_uploader.upload_file(temp_file_path)
+            success, result, info = self.qiniu_uploader.upload_bytes(data, file_name)
             
             if success:
                 logger.info(f"七牛云上传成功: {result}")
@@ -113,7 +171,7 @@ class UploadManager:
                 print(f"⚠️ 七牛云上传失败，尝试阿里云: {result}")
             
             # 七牛云失败，尝试阿里云
-            success, result, info = self.aliyun_uploader.upload_file(temp_file_path)
+            success, result, info = self.aliyun_uploader.upload_bytes(data, file_name)
             
             if success:
                 logger.info(f"阿里云上传成功: {result}")
@@ -136,20 +194,104 @@ class UploadManager:
             if on_failure:
                 on_failure(error_msg)
             return ""
+    
+    def _upload_hedged(
+        self,
+        data: bytes,
+        file_name: str,
+        on_success: Optional[Callable[[str], None]] = None,
+        on_failure: Optional[Callable[[str], None]] = None,
+        slot: Optional[_SlotHold] = None
+    ) -> str:
+        """
+        对冲上传：七牛云先行，超过 hedge_delay 秒仍未完成或已失败时同时上传阿里云，返回先成功的URL
+
+        已开始的上传无法中断，落败方仍会上传完成；其完成后删除落败方存储中的重复文件，
+        并在此之前一直占用 slot 名额，使待完成上传数的限制同样约束其数据缓冲区
+        """
+        primary = self._hedge_executor.submit(self.qiniu_uploader.upload_bytes, data, file_name)
+        done, _ = wait([primary], timeout=self.hedge_delay)
+        
+        futures: Dict[Future, Tuple[str, object]] = {}
+        if primary in done:
+            success, result, info = primary.result()
+            if success:
+                logger.info(f"七牛云上传成功: {result}")
+                print(f"🎬 七牛云上传成功: {result}")
+                if on_success:
+                    on_success(result)
+                return result
+            logger.warning(f"七牛云上传失败: {result}")
+            print(f"⚠️ 七牛云上传失败，尝试阿里云: {result}")
+        else:
+            logger.info(f"七牛云上传超过 {self.hedge_delay} 秒未完成，同时尝试阿里云")
+            futures[primary] = ("七牛云", self.qiniu_uploader)
+        aliyun_future = self._hedge_executor.submit(self.aliyun_uploader.upload_bytes, data, file_name)
+        futures[aliyun_future] = ("阿里云", self.aliyun_uploader)
+        
+        for future in as_completed(futures):
+            success, result, info = future.result()
+            provider = futures[future][0]
+            if success:
+                # 已开始的上传无法中断，只能取消尚未开始的；仍在上传的交给 _discard_loser 善后
+                for other, (other_provider, uploader) in futures.items():
+                    if other is not future and not other.cancel():
+                        if slot is not None:
+                            slot.retain()
+                        other.add_done_callback(
+                            lambda f, p=other_provider, u=uploader: self._discard_loser(f, p, u, slot)
+                        )
+                logger.info(f"{provider}上传成功: {result}")
+                print(f"☁️ {provider}上传成功: {result}")
+                if on_success:
+                    on_success(result)
+                return result
+            logger.warning(f"{provider}上传失败: {result}")
+        
+        error_msg = f"所有上传方式都失败了: 七牛云和阿里云都上传失败"
+        logger.error(error_msg)
+        print(f"❌ {error_msg}")
+        if on_failure:
+            on_failure(error_msg)
+        return ""
+    
+    def _discard_loser(self, future: Future, provider: str, uploader, slot: Optional[_SlotHold]) -> None:
+        """对冲上传落败方结束后删除其上传成功的重复文件，并归还其占用的名额"""
+        try:
+            if future.cancelled():
+                return
+            success, result, info = future.result()
+            if success and info.get('key'):
+                if uploader.delete_file(info['key']):
+                    logger.info(f"已删除对冲上传在{provider}产生的重复文件: {result}")
+                else:
+                    logger.warning(f"删除对冲上传在{provider}产生的重复文件失败: {result}")
+        except Exception as e:
+            logger.warning(f"清理对冲上传的重复文件失败: {e}")
         finally:
-            # 清理临时文件
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except Exception as e:
-                    logger.warning(f"清理临时文件失败: {e}")
+            if slot is not None:
+                slot.release()
     
     def shutdown(self):
         """关闭上传管理器"""
         self.executor.shutdown(wait=True)
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=True)
 
-# 全局上传管理器实例
-_upload_manager = UploadManager()
+# 全局上传管理器实例（首次上传时才创建，避免导入时初始化上传客户端）
+_upload_manager: Optional[UploadManager] = None
+_upload_manager_lock = threading.Lock()
+
+
+def get_upload_manager() -> UploadManager:
+    """获取全局上传管理器实例（线程安全的延迟初始化），设置环境变量 UPLOAD_HEDGE_DELAY（秒）启用对冲上传"""
+    global _upload_manager
+    if _upload_manager is None:
+        with _upload_manager_lock:
+            if _upload_manager is None:
+                hedge_delay = os.getenv('UPLOAD_HEDGE_DELAY')
+                _upload_manager = UploadManager(hedge_delay=float(hedge_delay) if hedge_delay else None)
+    return _upload_manager
 
 def upload_to_qiniu(data: bytes, file_extension: str = "mp4", timeout: int = 300) -> str:
     """
@@ -163,7 +305,7 @@ def upload_to_qiniu(data: bytes, file_extension: str = "mp4", timeout: int = 300
     Returns:
         文件URL，失败时返回空字符串
     """
-    return _upload_manager.upload_sync(data, file_extension)
+    return get_upload_manager().upload_sync(data, file_extension)
 
 def upload_async(
     data: bytes, 
@@ -183,7 +325,19 @@ def upload_async(
     Returns:
         Future对象
     """
-    return _upload_manager.upload_async(data, file_extension, on_success, on_failure)
+    return get_upload_manager().upload_async(data, file_extension, on_success, on_failure)
+
+def upload_many(items: List[Tuple[bytes, str]]) -> List[str]:
+    """
+    并发上传多个文件
+    
+    Args:
+        items: (文件二进制数据, 文件扩展名) 列表
+        
+    Returns:
+        与items顺序对应的文件URL列表，失败的项为空字符串
+    """
+    return get_upload_manager().upload_many(items)
 
 def main():
     """测试上传管理器"""
@@ -231,7 +385,7 @@ def main():
     print(f"🔄 异步上传结果: {result}")
     
     # 关闭上传管理器
-    _upload_manager.shutdown()
+    get_upload_manager().shutdown()
     print("\n🏁 测试完成")
 
 if __name__ == "__main__":
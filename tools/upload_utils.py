@@ -0,0 +1,19 @@
+import logging
+
+
+def log_upload_error(logger: logging.Logger, error_msg: str, error: Exception) -> None:
+    """
+    记录上传失败日志
+
+    仅在DEBUG级别下记录完整堆栈，避免高并发超时场景下反复格式化traceback；
+    其他级别只记录异常类型
+
+    Args:
+        logger: 调用方模块的日志记录器
+        error_msg: 错误描述
+        error: 捕获到的异常
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.error(error_msg, exc_info=error)
+    else:
+        logger.error("%s (%s)", error_msg, type(error).__name__)